@@ -0,0 +1,172 @@
+import concurrent.futures
+import multiprocessing
+import argparse
+import asyncio
+import random
+import numpy
+import time
+import json
+
+from isec.app import App, Resource
+from isec.instance import LoopHandler
+
+from game.instances.world import World
+
+
+class ScriptedWorld(World):
+    """
+    A world whose player follows script instead of the keyboard and mouse.
+
+    Each step of the script holds its keys and aims at its angle for its duration, in simulated seconds.
+    The last step keeps going once the script is over.
+    """
+
+    def __init__(self,
+                 script: list[dict[str, ...]]) -> None:
+
+        super().__init__()
+
+        self.script = script
+        self.script_ends = numpy.cumsum([step["duration"] for step in script])
+
+        self.deaths = 0
+        self.zone_exit_time: float | None = None
+        self.frame_costs: list[float] = []
+
+    async def loop(self) -> None:
+        self.apply_script()
+
+        start = time.perf_counter()
+        await super().loop()
+        self.frame_costs.append(time.perf_counter() - start)
+
+    async def change_world(self,
+                           map_name: str = None) -> None:
+
+        # World.loop starts the respawn transition on the frame the player dies, this is the one place to see it.
+        if self.transition is None and self.player.dead:
+            self.deaths += 1
+
+        elif self.transition is None and map_name != World.map_name and self.zone_exit_time is None:
+            self.zone_exit_time = LoopHandler.simulated_time
+
+        await super().change_world(map_name)
+
+    def apply_script(self) -> None:
+        if not self.script:
+            return
+
+        step_index = min(numpy.searchsorted(self.script_ends, LoopHandler.simulated_time, side="right"),
+                         len(self.script) - 1)
+        step = self.script[step_index]
+
+        self.player.target_angle = step["angle"]
+        for key in step["keys"]:
+            self.player.pressed[key] = True
+
+
+def run_simulation(map_name: str,
+                   script_name: str,
+                   duration: float,
+                   seed: int,
+                   stop_on_exit: bool = True) -> dict[str, ...]:
+    """
+    Run one headless world for duration simulated seconds, and return its metrics.
+
+    Meant to run in its own process: App, Resource and LoopHandler state is class-level, so one process
+    can't hold two worlds.
+    """
+
+    random.seed(seed)
+    numpy.random.seed(seed)
+
+    App.init("game/assets/", headless=True)
+
+    if map_name not in Resource.data["maps"]:
+        raise ValueError(f"Unknown map {map_name}")
+
+    World.map_name = map_name
+    world = ScriptedWorld(Resource.data["instances"]["batch_runner"]["scripts"][script_name])
+    wall_start = time.perf_counter()
+
+    async def simulate():
+        await world.setup()
+        LoopHandler.stack.append(world)
+
+        while LoopHandler.simulated_time < duration:
+            if stop_on_exit and world.zone_exit_time is not None:
+                break
+
+            await world._preloop()
+            await world.loop()
+
+    asyncio.run(simulate())
+    wall_time = time.perf_counter() - wall_start
+    frame_costs = numpy.array(world.frame_costs) * 1000
+
+    return {"map": map_name,
+            "script": script_name,
+            "seed": seed,
+            "ticks": LoopHandler.frame_count,
+            "simulated_time": LoopHandler.simulated_time,
+            "wall_time": wall_time,
+            "deaths": world.deaths,
+            "zone_exit_time": world.zone_exit_time,
+            "frame_cost_mean": float(frame_costs.mean()) if len(frame_costs) else 0,
+            "frame_cost_p95": float(numpy.percentile(frame_costs, 95)) if len(frame_costs) else 0}
+
+
+def run_batch(map_name: str,
+              script_name: str,
+              runs: int,
+              duration: float,
+              workers: int = None,
+              stop_on_exit: bool = True) -> list[dict[str, ...]]:
+    """Run independent simulations across a process pool. Every run gets a fresh process, hence fresh globals."""
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context("spawn"),
+                                                max_tasks_per_child=1) as executor:
+
+        futures = [executor.submit(run_simulation, map_name, script_name, duration, seed, stop_on_exit)
+                   for seed in range(runs)]
+
+        return [future.result() for future in futures]
+
+
+def format_report(results: list[dict[str, ...]]) -> str:
+    lines = [f"{'seed':>4} {'ticks':>6} {'deaths':>6} {'exit (s)':>9} {'frame (ms)':>10} {'p95 (ms)':>9} {'speed':>6}"]
+
+    for result in results:
+        exit_time = "-" if result["zone_exit_time"] is None else f"{result['zone_exit_time']:.2f}"
+        lines.append(f"{result['seed']:>4} {result['ticks']:>6} {result['deaths']:>6} {exit_time:>9} "
+                     f"{result['frame_cost_mean']:>10.3f} {result['frame_cost_p95']:>9.3f} "
+                     f"{result['simulated_time'] / result['wall_time']:>5.1f}x")
+
+    exit_times = [result["zone_exit_time"] for result in results if result["zone_exit_time"] is not None]
+    lines.append(f"{len(results)} runs on {results[0]['map']} ({results[0]['script']}): "
+                 f"{sum(result['deaths'] for result in results)} deaths, "
+                 f"{len(exit_times)} zone exits"
+                 + (f" (mean {numpy.mean(exit_times):.2f} s)" if exit_times else "")
+                 + f", {numpy.mean([result['frame_cost_mean'] for result in results]):.3f} ms per frame")
+
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--map", default="surface")
+    parser.add_argument("--script", default="dive")
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=60, help="simulated seconds per run at most")
+    parser.add_argument("--keep-going", action="store_true", help="don't stop a run when the player exits the zone")
+    parser.add_argument("--json", default=None, help="also write the metrics of every run to this file")
+    args = parser.parse_args()
+
+    batch_results = run_batch(args.map, args.script, args.runs, args.duration, args.workers, not args.keep_going)
+    print(format_report(batch_results))
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump(batch_results, file, indent=2)
@@ -1,10 +1,11 @@
 import pygame
+import numpy
 
-from isec.app import Resource
+from isec.app import App, Resource
 from isec.instance import BaseInstance, LoopHandler
-from isec.environment import TilemapScene, EntityScene
+from isec.environment import TilemapScene, EntityScene, EntityPool
 from isec.environment.base.scene import Scene
-from isec.environment.base import Entity
+from isec.environment.base import Entity, Pos
 from isec.environment.tile_utils import TileCollision
 
 from game.objects.tile_helper import TileHelper
@@ -37,11 +38,16 @@ class World(BaseInstance):
         self.entity_scene: EntityScene | None = None
         self.terrain_scene: TilemapScene | None = None
         self.gui_scene: EntityScene = EntityScene(fps=self.fps)
-        self.collision_map: list[list[bool]] | None = None
+        self.collision_map: numpy.ndarray | None = None
+        self.tile_collision: TileCollision | None = None
 
         self.screen_filter: ScreenFilter = ScreenFilter()
         self.transition: Transition | None = None
 
+        # Transitions and blobs are recreated on every respawn and zone change, they are reused instead.
+        self.transition_pool = EntityPool(Transition, capacity=1)
+        self.blob_pool = EntityPool(Blob, capacity=8)
+
         self.player: Player | None = None
 
         self.spawn_position: tuple[int, int] | None = None
@@ -57,13 +63,15 @@ class World(BaseInstance):
         await self.load_world(World.map_name)
 
     async def loop(self) -> None:
-        self.window.fill(self.color)
-        LoopHandler.fps_caption()
+        if not App.headless:
+            self.window.fill(self.color)
+            LoopHandler.fps_caption()
 
         if self.transition is None:
             for scene in self.scenes:
                 scene.update(self.delta)
         self.gui_scene.update(self.delta)
+        self.player.clear_input()
 
         if World.map_name in ["surface", "surface_end"] and self.player.position.position[1] < 223:
             force = tuple(pygame.Vector2(0, 200000).rotate(self.player.position.a))
@@ -74,21 +82,23 @@ class World(BaseInstance):
 
         self.sync_camera_with_player()
 
-        for scene in self.scenes:
-            scene.render()
-        self.gui_scene.render()
+        if not App.headless:
+            for scene in self.scenes:
+                scene.render()
+            self.gui_scene.render()
 
         if self.player.dead and self.transition is None:
             await self.change_world(World.map_name)
 
         if self.transition is not None:
             if self.transition.done:
+                # Done transitions mark themselves to_delete, so the gui scene already released it to the pool.
                 self.transition = None
-                self.gui_scene.remove_entities_by_name("Transition")
             else:
                 await self.change_world()
 
-        self.screen_filter.position.position = tuple(self.entity_scene.camera.get_offset_pos(self.player.position))
+        self.screen_filter.position.position = tuple(self.entity_scene.get_render_position(self.player) -
+                                                     self.entity_scene.camera.position.position)
 
     async def finish(self):
         pygame.mixer.stop()
@@ -97,7 +107,7 @@ class World(BaseInstance):
     async def change_world(self,
                            map_name: str = None) -> None:
         if self.transition is None:
-            self.transition = Transition(map_name)
+            self.transition = self.transition_pool.acquire(map_name)
             self.gui_scene.add_entities(self.transition)
 
         if self.transition.ready_to_transition and not self.transition.transitioned:
@@ -126,15 +136,30 @@ class World(BaseInstance):
         await self.set_music(self.map_dict["music"]["track"],
                              self.map_dict["music"]["volume"])
 
+        if Resource.data["engine"]["resource"]["loading"]["report"]:
+            print(f"Tile collision ({map_name}): {self.tile_collision.report()}")
+
     async def purge_world(self) -> None:
         pygame.mixer.fadeout(100)
+
+        if self.entity_scene is not None:
+            blobs = self.entity_scene.get_entities_by_type(Blob)
+            for blob in blobs:
+                blob.to_delete = True
+            self.entity_scene.remove_entities(*blobs)
+
         self.scenes.clear()
         self.event_handler.clear()
         self.detectors.clear()
         self.window.fill(Resource.data["color"]["list"][-1])
 
     async def create_scenes(self) -> None:
-        self.entity_scene = EntityScene(fps=self.fps)
+        world_data = Resource.data["instances"]["world"]
+        self.entity_scene = EntityScene(fps=self.fps,
+                                        render_queue=True,
+                                        culling_cell_size=world_data["culling_cell_size"],
+                                        fixed_timestep=world_data["fixed_timestep"],
+                                        max_substeps=world_data["max_substeps"])
         self.terrain_scene = TilemapScene(tilemap=Resource.data["maps"][f"{World.map_name}_terrain"],
                                           tileset=TileHelper.get_tile_set(),
                                           camera=self.entity_scene.camera)
@@ -145,17 +170,21 @@ class World(BaseInstance):
         self.scenes.append(self.entity_scene)
 
     async def create_terrain(self) -> None:
-        self.collision_map = TilemapScene.create_collision_map(Resource.data["maps"][f"{World.map_name}_terrain"],
-                                                               TileHelper.get_collision_tile_id())
+        self.collision_map = TilemapScene.create_collision_mask(Resource.data["maps"][f"{World.map_name}_terrain"],
+                                                                TileHelper.get_collision_tile_id())
 
     async def create_entities(self) -> None:
 
         self.player = Player(self.entity_scene, self.spawn_position)   # (850, 20))
         self.player.position.a = self.spawn_angle
-        tile_collision = TileCollision(self.collision_map,
-                                       TileHelper.tile_size,
-                                       collision_type=CollisionTypes.WALL,
-                                       wall_friction=0.2)
+        world_data = Resource.data["instances"]["world"]
+        self.tile_collision = TileCollision(self.collision_map,
+                                            TileHelper.tile_size,
+                                            collision_type=CollisionTypes.WALL,
+                                            wall_friction=0.2,
+                                            merge_mode=world_data["collision_merge_mode"],
+                                            chunk_size=world_data["collision_chunk_size"],
+                                            activation_margin=world_data["collision_activation_margin"])
 
         additional_background_entities = []
         additional_foreground_entities = []
@@ -167,10 +196,11 @@ class World(BaseInstance):
             additional_foreground_entities.append(entity)
             # additional_entities.append(self.create_entity_from_dict(map_entities_dict))
 
-        self.entity_scene.add_entities(tile_collision,
-                                       *additional_background_entities,
-                                       self.player,
-                                       *additional_foreground_entities)
+        self.entity_scene.add_entities(self.tile_collision)
+
+        # Entities placed with a plain Pos never move, so they are only bucketed once for culling.
+        for entity in [*additional_background_entities, self.player, *additional_foreground_entities]:
+            self.entity_scene.add_entities(entity, static=type(entity.position) is Pos)
 
         if self.map_dict["graphics"]["spotlight_enabled"]:
             player_spotlight = PlayerSpotlight(self.player.position,
@@ -179,6 +209,8 @@ class World(BaseInstance):
 
             self.entity_scene.add_entities(player_spotlight)
 
+        self.entity_scene.add_entities(self.player.bubbles)
+
     async def add_entity_dict(self,
                               entity_dict: dict) -> None:
 
@@ -288,10 +320,10 @@ class World(BaseInstance):
             return False, SeaBottom()
 
         if entity_type == "blob":
-            return False, Blob(self,
-                               entity_dict["direction"],
-                               entity_dict["position"],
-                               entity_dict["speed"])
+            return False, self.blob_pool.acquire(self,
+                                                 entity_dict["direction"],
+                                                 entity_dict["position"],
+                                                 entity_dict["speed"])
 
         if entity_type == "artifact":
             return False, Artifact()
@@ -299,8 +331,9 @@ class World(BaseInstance):
         raise ValueError(f"Unknown entity type {entity_type}")
 
     def sync_camera_with_player(self) -> None:
-        camera_x = min(max(0, self.player.position.position[0]-200), self.terrain_scene.map_size_pixels[0] - 400)
-        camera_y = min(max(0, self.player.position.position[1]-150), self.terrain_scene.map_size_pixels[1] - 300)
+        player_position = self.entity_scene.get_render_position(self.player)
+        camera_x = min(max(0, player_position[0]-200), self.terrain_scene.map_size_pixels[0] - 400)
+        camera_y = min(max(0, player_position[1]-150), self.terrain_scene.map_size_pixels[1] - 300)
 
         self.terrain_scene.camera.position.position[0] = camera_x
         self.terrain_scene.camera.position.position[1] = camera_y
@@ -313,7 +346,7 @@ class World(BaseInstance):
         LoopHandler.stop_instance(self)
 
     async def print_location(self):
-        print(self.entity_scene.camera.position.position + pygame.mouse.get_pos())
+        print(self.entity_scene.camera.position.position + self.event_handler.mouse_pos)
 
     async def swap_velocity(self) -> None:
         if self.player.thrust_current == self.player.thrust_exploration:
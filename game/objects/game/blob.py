@@ -7,45 +7,70 @@ from isec.environment.position import SimplePos
 
 
 class Blob(Entity):
+    _surfaces: dict[tuple[int, int], list[pygame.Surface]] = {}  # Oriented surfaces, by direction.
+
     def __init__(self,
                  world,
                  direction: tuple[int, int],
                  pos: int,
                  speed: int) -> None:
 
+        super().__init__(SimplePos(), self._create_sprite(direction))
+        self.sprite: AnimatedSprite
+        self.direction = tuple(direction)
+        self.reset(world, direction, pos, speed)
+
+    def reset(self,
+              world,
+              direction: tuple[int, int],
+              pos: int,
+              speed: int) -> None:
+
+        super().reset()
+
+        if all(direction):
+            # raise error because no diagonal movement is allowed
+            raise ValueError("No diagonal movement is allowed")
+
         self.world = world
         self.player = self.world.player
-        self.direction = direction
         self.blocked = False
         self.player_dead = False
         self.player_dead_in = 1
 
-        if all(direction):
-            # raise error because no diagonal movement is allowed
-            raise ValueError("No diagonal movement is allowed")
+        if tuple(direction) != self.direction:
+            self.sprite = self._create_sprite(direction)
+        self.direction = tuple(direction)
+        self.animated_sprite = self.sprite
+        self.animated_sprite.restart([1, 0, 0])
 
-        position = SimplePos(position=(pos*abs(direction[0]), pos*abs(direction[1])),
-                             speed=(speed*direction[0], speed*direction[1]))
+        self.position.position.update(pos*abs(direction[0]), pos*abs(direction[1]))
+        self.position.speed.update(speed*direction[0], speed*direction[1])
 
-        monster_surfaces = [Resource.image["game"][f"blob_{i+1}"] for i in range(3)]
-        if direction[1]:
-            for i in range(len(monster_surfaces)):
-                monster_surfaces[i] = pygame.transform.rotate(monster_surfaces[i], -90)
+    @classmethod
+    def _create_sprite(cls,
+                       direction: tuple[int, int]) -> AnimatedSprite:
 
-        if direction[0] < 0:
-            for i in range(len(monster_surfaces)):
-                monster_surfaces[i] = pygame.transform.flip(monster_surfaces[i], True, False)
+        direction = tuple(direction)
+        if direction not in cls._surfaces:
+            monster_surfaces = [Resource.image["game"][f"blob_{i+1}"] for i in range(3)]
+            if direction[1]:
+                for i in range(len(monster_surfaces)):
+                    monster_surfaces[i] = pygame.transform.rotate(monster_surfaces[i], -90)
 
-        if direction[1] < 0:
-            for i in range(len(monster_surfaces)):
-                monster_surfaces[i] = pygame.transform.flip(monster_surfaces[i], False, True)
+            if direction[0] < 0:
+                for i in range(len(monster_surfaces)):
+                    monster_surfaces[i] = pygame.transform.flip(monster_surfaces[i], True, False)
 
-        self.animated_sprite = AnimatedSprite(monster_surfaces,
-                                              rendering_technique="optimized_static",
-                                              frame_durations=[1, 0, 0])
+            if direction[1] < 0:
+                for i in range(len(monster_surfaces)):
+                    monster_surfaces[i] = pygame.transform.flip(monster_surfaces[i], False, True)
 
-        super().__init__(position, self.animated_sprite)
-        self.sprite: AnimatedSprite
+            cls._surfaces[direction] = monster_surfaces
+
+        return AnimatedSprite(cls._surfaces[direction],
+                              rendering_technique="optimized_static",
+                              frame_durations=[1, 0, 0])
 
     def update(self,
                delta: float) -> None:
@@ -53,7 +78,7 @@ class Blob(Entity):
         x, y = self.position.position
         x = self.player.position.position[0] if self.direction[0] == 0 else x
         y = self.player.position.position[1] if self.direction[1] == 0 else y
-        self.position.position = x, y
+        self.position.position.update(x, y)
 
         super().update(delta)
 
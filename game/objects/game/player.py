@@ -1,15 +1,15 @@
 import pygame
 import random
+import numpy
 import math
-import time
 
 from isec.app import Resource
 from isec.environment import Entity, Sprite, EntityScene
 from isec.environment.position import PymunkPos
-from isec.instance import BaseInstance
+from isec.environment.particle import ParticleEmitter
+from isec.instance import BaseInstance, EventHandler
 
 from game.objects.controls import Controls
-from game.objects.game.bubble import Bubble
 from game.objects.game.collision_types import CollisionTypes
 
 
@@ -49,10 +49,15 @@ class Player(Entity):
         # Particle related
         self.max_bubble_spawn_frequency = 200
         self.max_speed_max_frequency = 200
-        self.bubble_last_spawn = time.time()
+        self.bubbles_to_spawn = 0
+        self.bubbles = ParticleEmitter(Resource.image["game"]["bubble"],
+                                       capacity=256,
+                                       acceleration=(0, -50),
+                                       damping=0.05)
 
         # Controls related
         self.pressed = {"up": False, "down": False, "left": False, "right": False, "boost": False}
+        self.target_angle: float | None = None   # Aimed at instead of the cursor when set, for scripted runs.
 
         # Audio related
         self.sound_to_play = None
@@ -74,14 +79,18 @@ class Player(Entity):
         self.play_sound()
 
     def get_angle_cursor_player(self) -> float | None:
-        player_screen_pos = pygame.Vector2(self.linked_scene.camera.get_offset_pos(self.position))
-        cursor_screen_pos = pygame.Vector2(pygame.mouse.get_pos())
-        relative_pos = cursor_screen_pos - player_screen_pos
+        if self.target_angle is None:
+            player_screen_pos = pygame.Vector2(self.linked_scene.camera.get_offset_pos(self.position))
+            cursor_screen_pos = pygame.Vector2(EventHandler.mouse_pos)
+            relative_pos = cursor_screen_pos - player_screen_pos
 
-        if relative_pos.length() == 0:
-            return None
+            if relative_pos.length() == 0:
+                return None
+
+            goal_angle = relative_pos.angle_to(pygame.Vector2(1, 0)) % 360
+        else:
+            goal_angle = self.target_angle % 360
 
-        goal_angle = relative_pos.angle_to(pygame.Vector2(1, 0)) % 360
         current_angle = self.position.a
 
         difference = (goal_angle - current_angle) % 360
@@ -115,7 +124,6 @@ class Player(Entity):
             input_vec += (1, 0)
 
         if input_vec.length() <= 0:
-            self.pressed = {"up": False, "down": False, "left": False, "right": False, "boost": False}
             self.sound_to_play = None
             return
 
@@ -139,7 +147,11 @@ class Player(Entity):
         speed.rotate_ip(-forward_angle)
         self.position.body.apply_force_at_local_point(tuple(speed), (0, 0))
 
-        self.pressed = {"up": False, "down": False, "left": False, "right": False, "boost": False}
+    def clear_input(self) -> None:
+        """Release the keys pressed this frame. Called once per frame, every substep of it moves the player."""
+
+        for key in self.pressed:
+            self.pressed[key] = False
 
     def play_sound(self) -> None:
         if self.sound_to_play is None:
@@ -170,16 +182,21 @@ class Player(Entity):
                                   * self.max_bubble_spawn_frequency)
 
         if bubble_spawn_frequency < 0.05:
+            self.bubbles_to_spawn = 0
+            return
+
+        self.bubbles_to_spawn += bubble_spawn_frequency * delta
+        count = int(self.bubbles_to_spawn)
+        if count == 0:
             return
 
-        bubble_spawn_period = 1 / bubble_spawn_frequency
+        self.bubbles_to_spawn -= count
 
-        diff = time.time() - self.bubble_last_spawn
-        while diff >= bubble_spawn_period:
-            diff -= bubble_spawn_period
-            self.bubble_last_spawn += bubble_spawn_period
-            self.linked_scene.add_entities(Bubble(tuple(self.position.position-2*self.position.body.rotation_vector),
-                                                  self.position.body.rotation_vector.angle_degrees))
+        angles = numpy.radians(numpy.random.normal(180 + self.position.body.rotation_vector.angle_degrees, 60, count))
+        speeds = numpy.random.randint(0, 1001, count) / 20
+        self.bubbles.emit(tuple(self.position.position - 2*self.position.body.rotation_vector),
+                          numpy.stack((numpy.cos(angles), numpy.sin(angles)), axis=-1) * speeds[:, None],
+                          numpy.random.randint(100, 201, count) / 400)
 
     def handle_impact(self,
                       kinetic_energy: float) -> None:
@@ -205,19 +222,19 @@ class Player(Entity):
             Resource.sound["game"][f"heavy_hit_{random.randint(1, 2)}"].play()
             self.life -= damages["heavy"]
 
-    async def cb_key_up(self) -> None:
+    def cb_key_up(self) -> None:
         self.pressed["up"] = True
 
-    async def cb_key_down(self) -> None:
+    def cb_key_down(self) -> None:
         self.pressed["down"] = True
 
-    async def cb_key_left(self) -> None:
+    def cb_key_left(self) -> None:
         self.pressed["left"] = True
 
-    async def cb_key_right(self) -> None:
+    def cb_key_right(self) -> None:
         self.pressed["right"] = True
 
-    async def cb_key_boost(self) -> None:
+    def cb_key_boost(self) -> None:
         self.pressed["boost"] = True
 
     def add_control_callbacks(self, linked_instance: BaseInstance) -> None:
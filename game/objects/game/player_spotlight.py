@@ -1,21 +1,25 @@
 import pygame
 import random
-import math
+import numpy
+
+from collections.abc import Iterable
 
 from isec.app import Resource
 from isec.environment import Entity, Sprite, Pos
+from isec.environment.tile_utils import TileRaycaster
 
 
 class PlayerSpotlight(Entity):
     def __init__(self,
                  player_position: Pos,
-                 collision_map: list[list[bool]],
-                 tile_size: int) -> None:
+                 collision_map: numpy.ndarray,
+                 tile_size: int,
+                 number_of_points: int = 50) -> None:
 
         self.collision_map = collision_map
         self.tile_size = tile_size
 
-        self.number_of_points = 50
+        self.number_of_points = number_of_points
         self.radius = 150
         self.opening_angle = 50
         self.max_bulb_size = 10
@@ -25,8 +29,9 @@ class PlayerSpotlight(Entity):
                              self.radius*2 + self.max_bulb_size*2)
         self.surface_half = self.surface_size[0]/2
 
-        self.light_bulb_size = [random.randint(self.min_bulb_size, self.max_bulb_size)
-                                for _ in range(self.number_of_points+1)]
+        self.light_bulb_size = numpy.array([random.randint(self.min_bulb_size, self.max_bulb_size)
+                                            for _ in range(self.number_of_points+1)])
+        self.raycaster = TileRaycaster(collision_map)
 
         sprite_surface = pygame.Surface(self.surface_size)
         sprite_surface.fill((0, 0, 0))
@@ -37,11 +42,14 @@ class PlayerSpotlight(Entity):
 
         super().__init__(position=player_position, sprite=self.sprite)
 
-    def update(self,
-               delta: float) -> None:
+    def render(self,
+               camera_offset: Iterable,
+               surface: pygame.Surface,
+               rect: pygame.Rect) -> None:
 
-        super().update(delta)
+        # Drawn when rendered rather than updated, so that headless runs don't pay for it.
         self.create_spotlight_surface()
+        super().render(camera_offset, surface, rect)
 
     @property
     def surface(self):
@@ -51,86 +59,26 @@ class PlayerSpotlight(Entity):
     def surface(self, value):
         self.sprite.surface = value
 
-    def create_spotlight_boundaries(self) -> tuple[list[pygame.Vector2], list[float]]:
+    def create_spotlight_boundaries(self) -> tuple[list[tuple[float, float]], list[float]]:
 
         vec_ray_start = pygame.Vector2(self.position.position[0], self.position.position[1])/self.tile_size
 
-        coordinates = [pygame.Vector2(0, 0)]
-        hit_strength = [0.0]
-
-        for i in range(self.number_of_points):
-            angle = -self.position.a - self.opening_angle/2 + i * self.opening_angle/(self.number_of_points - 1)
-
-            vec_ray_dir = pygame.Vector2(1, 0).rotate(angle)
-            vec_start_cell = pygame.Vector2(math.floor(vec_ray_start[0]),
-                                            math.floor(vec_ray_start[1]))
-
-            dir_y_over_x = float('+inf') if vec_ray_dir[0] == 0 else vec_ray_dir[1] / vec_ray_dir[0]
-            dir_x_over_y = float('+inf') if vec_ray_dir[1] == 0 else vec_ray_dir[0] / vec_ray_dir[1]
-
-            vec_ray_unit_step_size = pygame.Vector2(math.sqrt(1 + dir_y_over_x ** 2), math.sqrt(1 + dir_x_over_y ** 2))
-            vec_map_check = vec_start_cell.copy()
-
-            vec_ray_length_1d = pygame.Vector2(0, 0)
-            vec_step = pygame.Vector2(0, 0)
-
-            if vec_ray_dir[0] < 0:
-                vec_step[0] = -1
-                vec_ray_length_1d[0] = (vec_ray_start[0] - vec_start_cell[0]) * vec_ray_unit_step_size[0]
-
-            else:
-                vec_step[0] = 1
-                vec_ray_length_1d[0] = (vec_start_cell[0] + 1 - vec_ray_start[0]) * vec_ray_unit_step_size[0]
-
-            if vec_ray_dir[1] < 0:
-                vec_step[1] = -1
-                vec_ray_length_1d[1] = (vec_ray_start[1] - vec_start_cell[1]) * vec_ray_unit_step_size[1]
-
-            else:
-                vec_step[1] = 1
-                vec_ray_length_1d[1] = (vec_start_cell[1] + 1 - vec_ray_start[1]) * vec_ray_unit_step_size[1]
-
-            tile_found = False
-            max_distance = self.radius / self.tile_size
-            current_distance = 0
-
-            while not tile_found and current_distance < max_distance:
-                if vec_ray_length_1d[0] < vec_ray_length_1d[1]:
-                    vec_map_check[0] += vec_step[0]
-                    current_distance = vec_ray_length_1d[0]
-                    vec_ray_length_1d[0] += vec_ray_unit_step_size[0]
-
-                else:
-                    vec_map_check[1] += vec_step[1]
-                    current_distance = vec_ray_length_1d[1]
-                    vec_ray_length_1d[1] += vec_ray_unit_step_size[1]
-
-                y_floor = math.floor(vec_map_check[1])
-                x_floor = math.floor(vec_map_check[0])
-
-                if any((x_floor < 1,
-                        y_floor < 1,
-                        x_floor >= len(self.collision_map[0])-1,
-                        y_floor >= len(self.collision_map)-1)):
-
-                    tile_found = True
-                    current_distance = max_distance
+        angles = -self.position.a - self.opening_angle/2 + numpy.arange(self.number_of_points) * \
+            self.opening_angle/(self.number_of_points - 1)
+        directions = TileRaycaster.get_directions(angles)
 
-                elif self.collision_map[y_floor][x_floor]:
-                    tile_found = True
+        max_distance = self.radius / self.tile_size
+        distances, tiles_found = self.raycaster.cast(vec_ray_start, directions, max_distance)
+        distances = numpy.where(tiles_found, distances + self.light_bulb_size[1:]/15, distances)
 
-            if tile_found:
-                current_distance += self.light_bulb_size[i+1]/15
-            strength = 1 - current_distance / max_distance
-            strength = 2 * strength if strength < 0.5 else 1
-            hit_strength.append(strength)
-            coordinates.append(vec_ray_dir * min(max_distance, current_distance))
+        strength = 1 - distances / max_distance
+        strength = numpy.where(strength < 0.5, 2 * strength, 1)
 
-        for i in range(len(coordinates)):
-            coordinates[i] *= self.tile_size
-            coordinates[i] += (self.surface_half, self.surface_half)
+        coordinates = directions * numpy.minimum(max_distance, distances)[:, None] * self.tile_size
+        coordinates += self.surface_half
 
-        return coordinates, hit_strength
+        return ([(self.surface_half, self.surface_half)] + list(map(tuple, coordinates.tolist())),
+                [0.0] + strength.tolist())
 
     def create_spotlight_surface(self) -> None:
         coordinates, hit_strength = self.create_spotlight_boundaries()
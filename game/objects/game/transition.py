@@ -11,6 +11,14 @@ from isec.environment.position import SimplePos
 
 class Transition(Entity):
     def __init__(self, map_name: str):
+        super().__init__(SimplePos(), Sprite(Resource.image["game"]["frame"]))
+        self.reset(map_name)
+
+    def reset(self,
+              map_name: str) -> None:
+
+        super().reset()
+
         self.map_name = map_name
         self.ready_to_transition = False
         self.transitioned = False
@@ -23,9 +31,8 @@ class Transition(Entity):
         pos = 200 + 400 * -self.direction[0], 150 + 300 * -self.direction[1]
         self.speed = speed * fpos[0], speed * fpos[1]
 
-        position = SimplePos(pos, self.speed)
-        sprite = Sprite(Resource.image["game"]["frame"])
-        super().__init__(position, sprite)
+        self.position.position.update(pos)
+        self.position.speed.update(self.speed)
 
     def update(self,
                delta: float) -> None:
@@ -37,19 +44,19 @@ class Transition(Entity):
 
         if not self.ready_to_transition:
             if self.direction[0] > 0 and self.position.position[0] > 200:
-                self.position.position = (200, self.position.position[1])
+                self.position.position[0] = 200
                 self.ready_to_transition = True
 
             elif self.direction[0] < 0 and self.position.position[0] < 200:
-                self.position.position = (200, self.position.position[1])
+                self.position.position[0] = 200
                 self.ready_to_transition = True
 
             elif self.direction[1] > 0 and self.position.position[1] > 150:
-                self.position.position = (self.position.position[0], 150)
+                self.position.position[1] = 150
                 self.ready_to_transition = True
 
             elif self.direction[1] < 0 and self.position.position[1] < 150:
-                self.position.position = (self.position.position[0], 150)
+                self.position.position[1] = 150
                 self.ready_to_transition = True
 
         if self.direction[0] > 0 and self.position.position[0] > 600:
@@ -64,6 +71,9 @@ class Transition(Entity):
         elif self.direction[1] < 0 and self.position.position[1] < -150:
             self.done = True
 
+        if self.done:
+            self.to_delete = True
+
     def render(self,
                camera_offset: Iterable,
                surface: pygame.Surface,
@@ -1,4 +1,5 @@
 import pygame
+import os
 
 from isec.app.resource import Resource
 from isec._ise_typing import PathLike
@@ -7,12 +8,23 @@ from isec._ise_typing import PathLike
 class App:
     window: pygame.Surface = None
     window_rect: pygame.Rect = None
+    headless: bool = False
 
     @classmethod
     def init(cls,
              assets_dir: PathLike,
              default_safeguard: bool = True,
-             default_only: bool = False) -> None:
+             default_only: bool = False,
+             headless: bool = False) -> None:
+        """
+        In headless mode, the window and the sounds go to the dummy SDL drivers, nothing is shown nor heard,
+        and instances run as fast as possible with a fixed delta.
+        """
+
+        cls.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
 
         Resource.set_directory(assets_dir)
         Resource.pre_init(default_safeguard, default_only)
@@ -37,6 +49,8 @@ class App:
         window_size = Resource.data["engine"]["window"]["size"]
         window_flag = Resource.data["engine"]["window"]["scaled"] * pygame.SCALED
         window_flag |= Resource.data["engine"]["window"]["fullscreen"] * pygame.FULLSCREEN
+        if cls.headless:
+            window_flag = 0
         cls.window = pygame.display.set_mode(window_size, window_flag)
         cls.window_rect = cls.window.get_rect()
         pygame.display.set_caption(Resource.data["engine"]["window"]["name"])
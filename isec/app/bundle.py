@@ -0,0 +1,222 @@
+import pygame
+import typing
+import numpy
+import struct
+import json
+import mmap
+import csv
+import io
+import os
+
+from isec._ise_typing import PathLike
+from isec._ise_error import InvalidFileFormatError
+
+
+class Bundle:
+    """
+    A single packed file holding the content of an assets directory.
+
+    Layout:
+        - header: magic, version, index size.
+        - index:  utf-8 json, one entry per asset with its offset and size inside the data block.
+        - data:   json files, tilemaps as raw int16, images as raw RGBA pixels and encoded sounds.
+
+    The file is memory-mapped, so each asset but sounds is a slice of the mapping and is only paged in when used.
+    Streamed assets (music, fonts) are not packed and are still read from the source directory.
+    """
+
+    MAGIC = b"ISEB"
+    VERSION = 1
+
+    _HEADER = struct.Struct("<4sIQ")
+    _ALIGNMENT = 8
+
+    def __init__(self,
+                 bundle_path: PathLike) -> None:
+
+        self.path = bundle_path
+
+        with open(bundle_path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, version, index_size = self._HEADER.unpack_from(self._mmap, 0)
+
+        if magic != self.MAGIC:
+            raise InvalidFileFormatError(f"{bundle_path} is not an asset bundle")
+
+        if version != self.VERSION:
+            raise InvalidFileFormatError(f"{bundle_path} has version {version}, expected {self.VERSION}")
+
+        self._view = memoryview(self._mmap)
+        self._data_offset = self._HEADER.size + index_size
+
+        index = json.loads(str(self._view[self._HEADER.size:self._data_offset], "utf-8"))
+        self.entries: list[dict[str, ...]] = index["entries"]
+        self.source_directory = os.path.join(os.path.dirname(bundle_path), index["source"], "")
+
+    def get_entries(self,
+                    root: str) -> list[dict[str, ...]]:
+
+        return [entry for entry in self.entries if entry["root"] == root]
+
+    def get_slice(self,
+                  entry: dict[str, ...]) -> memoryview:
+        """Return the bytes of entry, without copying them out of the bundle."""
+
+        start = self._data_offset + entry["offset"]
+        return self._view[start:start+entry["size"]]
+
+    def load_json(self,
+                  entry: dict[str, ...]) -> dict[str, ...]:
+
+        return json.loads(str(self.get_slice(entry), "utf-8"))
+
+    def load_tilemap(self,
+                     entry: dict[str, ...]) -> numpy.ndarray:
+
+        return numpy.frombuffer(self.get_slice(entry), dtype=numpy.int16).reshape(entry["shape"])
+
+    def load_image(self,
+                   entry: dict[str, ...]) -> pygame.Surface:
+
+        return pygame.image.frombuffer(self.get_slice(entry), entry["shape"], "RGBA")
+
+    def load_sound(self,
+                   entry: dict[str, ...]) -> pygame.mixer.Sound:
+        """
+        Decode the sound of entry. Unlike other assets it is copied: the encoded bytes into a short-lived BytesIO,
+        then the decoded samples into the Sound (Sound(buffer=...) copies as well, so raw PCM wouldn't avoid it).
+        """
+
+        return pygame.mixer.Sound(file=io.BytesIO(self.get_slice(entry)))
+
+    @classmethod
+    def build(cls,
+              assets_dir: PathLike,
+              bundle_path: PathLike) -> None:
+        """Pack the data, image and sound folders of assets_dir into bundle_path."""
+
+        entries = []
+        chunks = []
+        offset = 0
+
+        def add_entry(entry: dict[str, ...],
+                      content: bytes) -> None:
+
+            nonlocal offset
+
+            padding = -len(content) % cls._ALIGNMENT
+            entry["offset"] = offset
+            entry["size"] = len(content)
+            entries.append(entry)
+            chunks.append(content + bytes(padding))
+            offset += len(content) + padding
+
+        for dir_path, key_path, file_name in cls._walk(os.path.join(assets_dir, "data")):
+            key_name = "".join(file_name.split(".")[:-1])
+
+            if file_name.endswith(".json"):
+                with open(dir_path + file_name, "rb") as file:
+                    add_entry({"root": "data", "kind": "json", "path": key_path + [key_name]}, file.read())
+
+            elif file_name.endswith(".csv"):
+                with open(dir_path + file_name) as file:
+                    tilemap = cls.parse_tilemap(file, file_name)
+
+                add_entry({"root": "data", "kind": "tilemap", "path": key_path + [key_name],
+                           "shape": list(tilemap.shape)}, tilemap.tobytes())
+
+            else:
+                raise InvalidFileFormatError(f"{file_name.split('.')[-1]} is not a supported data file format")
+
+        for dir_path, key_path, file_name in cls._walk(os.path.join(assets_dir, "image")):
+            key_name = "".join(file_name.split(".")[:-1])
+
+            if file_name == "index.json":
+                with open(dir_path + file_name, "rb") as file:
+                    add_entry({"root": "data", "kind": "json", "path": ["image"] + key_path}, file.read())
+
+            elif any(file_name.endswith(ext) for ext in [".png", ".jpg"]):
+                surface = pygame.image.load(dir_path + file_name)
+                add_entry({"root": "image", "kind": "image", "path": key_path + [key_name],
+                           "shape": list(surface.get_size())}, pygame.image.tobytes(surface, "RGBA"))
+
+            else:
+                raise InvalidFileFormatError(f"{file_name.split('.')[-1]} is not a supported image file format")
+
+        for dir_path, key_path, file_name in cls._walk(os.path.join(assets_dir, "sound")):
+            key_name = "".join(file_name.split(".")[:-1])
+
+            if file_name == "index.json":
+                with open(dir_path + file_name, "rb") as file:
+                    add_entry({"root": "data", "kind": "json", "path": ["sound"] + key_path}, file.read())
+
+            elif any(file_name.endswith(ext) for ext in [".wav", ".mp3", ".ogg"]):
+                with open(dir_path + file_name, "rb") as file:
+                    add_entry({"root": "sound", "kind": "sound", "path": key_path + [key_name]}, file.read())
+
+            else:
+                raise InvalidFileFormatError(f"{file_name.split('.')[-1]} is not a supported data file format")
+
+        source = os.path.relpath(assets_dir, os.path.dirname(os.path.abspath(bundle_path)))
+        index = json.dumps({"source": source, "entries": entries}).encode("utf-8")
+        index += b" " * (-(cls._HEADER.size + len(index)) % cls._ALIGNMENT)
+
+        with open(bundle_path, "wb") as file:
+            file.write(cls._HEADER.pack(cls.MAGIC, cls.VERSION, len(index)))
+            file.write(index)
+            for chunk in chunks:
+                file.write(chunk)
+
+    @staticmethod
+    def parse_tilemap(file: typing.TextIO,
+                      name: str) -> numpy.ndarray:
+        """Parse a csv tilemap into an int16 array, raise if it isn't rectangular or a tile id doesn't fit."""
+
+        rows = [list(map(int, rec)) for rec in csv.reader(file, delimiter=",")]
+
+        try:
+            tilemap = numpy.array(rows, dtype=numpy.int64)
+        except ValueError as error:
+            raise InvalidFileFormatError(f"{name} is not a rectangular tilemap") from error
+
+        limits = numpy.iinfo(numpy.int16)
+        if tilemap.size and (tilemap.max() > limits.max or tilemap.min() < limits.min):
+            raise InvalidFileFormatError(f"{name} has tile ids out of the int16 range")
+
+        return tilemap.astype(numpy.int16)
+
+    @classmethod
+    def _walk(cls,
+              directory: PathLike,
+              key_path: list[str] = None) -> list[tuple[str, list[str], str]]:
+        """List (directory, key path, file name) for every file under directory, in scan order."""
+
+        if key_path is None:
+            key_path = []
+
+        if not os.path.isdir(directory):
+            return []
+
+        files = []
+        directory = os.path.join(directory, "")
+
+        for elem in os.scandir(directory):
+            if elem.is_dir():
+                files.extend(cls._walk(directory + elem.name, key_path + [elem.name]))
+
+            elif elem.is_file():
+                files.append((directory, key_path, elem.name))
+
+        return files
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m isec.app.bundle <assets_dir> <bundle_path>")
+        sys.exit(1)
+
+    Bundle.build(sys.argv[1], sys.argv[2])
+    print(f"{sys.argv[2]}: {len(Bundle(sys.argv[2]).entries)} assets, {os.path.getsize(sys.argv[2])} bytes")
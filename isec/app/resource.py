@@ -1,24 +1,49 @@
+import concurrent.futures
+import contextlib
+import functools
 import pygame
+import typing
+import numpy
 import json
-import csv
+import time
+import io
 import os
 
 from isec._ise_typing import PathLike
 from isec._ise_error import InvalidFileFormatError
-from isec.objects import CachedSurface
+from isec.app.bundle import Bundle
+from isec.objects import CachedSurface, LazyDict
+from isec.objects.disk_cache import DiskCache
+from isec.objects.surface_atlas import SurfaceAtlas
 
 
 class Resource:
     default_assets_directory: PathLike = None
     project_assets_directory: PathLike = None
+    bundle: Bundle | None = None
 
     data: dict[str: dict[str: any]] = {}
-    image: dict[str: dict[str: any]] = {}
-    sound: dict[str: dict[str: any]] = {}
+    image: LazyDict[str: dict[str: any]] = LazyDict()
+    sound: LazyDict[str: dict[str: any]] = LazyDict()
+
+    timings: dict[str, float] = {}
+    tilemap_cache: DiskCache | None = None
+    rotation_cache: DiskCache | None = None
+    atlas: SurfaceAtlas | None = None
+
+    _lazy: bool = False
+    _executor: concurrent.futures.ThreadPoolExecutor | None = None
+    _pending: list[tuple[dict, str, concurrent.futures.Future, typing.Callable | None]] = []
+    _pending_csv: list[tuple[dict, str, PathLike]] = []
 
     @classmethod
     def set_directory(cls,
                       assets_dir: PathLike) -> None:
+        """Set the project assets, either an assets directory or a bundle built from one."""
+
+        if os.path.isfile(assets_dir):
+            cls.bundle = Bundle(assets_dir)
+            assets_dir = cls.bundle.source_directory
 
         cls.project_assets_directory = assets_dir
 
@@ -27,30 +52,170 @@ class Resource:
                  default_safeguard: bool = True,
                  default_only: bool = False) -> None:
 
-        if default_safeguard or default_only:
-            cls._get_default_assets_directory()
-            cls._load_data(cls.default_assets_directory)
+        with cls._timed("data"):
+            if default_safeguard or default_only:
+                cls._get_default_assets_directory()
+                cls._load_data(cls.default_assets_directory)
+
+            if not default_only and cls.bundle is not None:
+                cls._load_bundle_data()
+
+            elif not default_only:
+                cls._load_data(cls.project_assets_directory)
+
+            cls._init_disk_cache()
 
-        if not default_only:
-            cls._load_data(cls.project_assets_directory)
+            for current_dict, key_name, file_path in cls._pending_csv:
+                current_dict[key_name] = cls._load_csv(file_path)
+            cls._pending_csv.clear()
 
     @classmethod
     def init(cls,
              default_safeguard: bool = True,
              default_only: bool = False) -> None:
 
-        if default_safeguard or default_only:
-            cls._get_default_assets_directory()
-            cls._load_image(cls.default_assets_directory)
-            cls._load_sound(cls.default_assets_directory)
+        loading_params = cls.data["engine"]["resource"]["loading"]
+
+        cls._lazy = loading_params["lazy"]
+
+        if loading_params["parallel"] and not cls._lazy:
+            cls._executor = concurrent.futures.ThreadPoolExecutor(max_workers=loading_params["workers"],
+                                                                  thread_name_prefix="resource")
+
+        with cls._timed("scan"):
+            if default_safeguard or default_only:
+                cls._get_default_assets_directory()
+                cls._load_image(cls.default_assets_directory)
+                cls._load_sound(cls.default_assets_directory)
+
+            if not default_only and cls.bundle is not None:
+                cls._load_bundle_files()
+
+            elif not default_only:
+                cls._load_image(cls.project_assets_directory)
+                cls._load_sound(cls.project_assets_directory)
+
+        with cls._timed("decode"):
+            cls._resolve_pending()
 
-        if not default_only:
-            cls._load_image(cls.project_assets_directory)
-            cls._load_sound(cls.project_assets_directory)
+        with cls._timed("cache"):
+            cls._cache()
+
+        atlas_params = cls.data["engine"]["resource"]["surface"]["atlas"]
+
+        if atlas_params["enabled"]:
+            with cls._timed("atlas"):
+                cls.build_atlas(atlas_params["directories"], atlas_params["sheet_size"])
 
-        cls._cache()
         cls.set_volume()
 
+        if loading_params["report"]:
+            cls.print_report()
+
+    @classmethod
+    @contextlib.contextmanager
+    def _timed(cls,
+               step_name: str) -> typing.Iterator[None]:
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.timings[step_name] = cls.timings.get(step_name, 0) + time.perf_counter() - start
+
+    @classmethod
+    def print_report(cls) -> None:
+        """Print the time spent in each loading step."""
+
+        loading_params = cls.data["engine"]["resource"]["loading"]
+        if loading_params["lazy"]:
+            mode = "lazy"
+        elif loading_params["parallel"]:
+            mode = f"parallel, workers={loading_params['workers']}"
+        else:
+            mode = "sequential"
+
+        print(f"Resource loading ({mode}):")
+        for step_name, duration in cls.timings.items():
+            print(f"    {step_name:<8} {duration*1000:8.1f} ms")
+        print(f"    {'total':<8} {sum(cls.timings.values())*1000:8.1f} ms")
+
+        if cls.tilemap_cache is not None:
+            print(f"Tilemap cache: {cls.tilemap_cache.report()}")
+
+        if cls.rotation_cache is not None:
+            print(f"Rotation cache: {cls.rotation_cache.report()}")
+
+    @classmethod
+    def _init_disk_cache(cls) -> None:
+        cache_params = cls.data["engine"]["resource"]["disk_cache"]
+
+        if not cache_params["enabled"]:
+            return
+
+        directory = cache_params["directory"]
+        if directory is None:
+            directory = cls.default_assets_directory if cls.project_assets_directory is None \
+                else cls.project_assets_directory
+            directory = os.path.join(directory, ".cache")
+
+        if cache_params["tilemaps"]:
+            cls.tilemap_cache = DiskCache(os.path.join(directory, "tilemaps"))
+            if not cls.tilemap_cache.prepare():
+                cls.tilemap_cache = None
+
+        if cache_params["rotations"]:
+            cls.rotation_cache = DiskCache(os.path.join(directory, "rotations"))
+            if not cls.rotation_cache.prepare():
+                cls.rotation_cache = None
+
+    @classmethod
+    def _load_file(cls,
+                   target_dict: LazyDict,
+                   key_name: str,
+                   loader: typing.Callable[[typing.Any], typing.Any],
+                   source: PathLike | dict[str, ...],
+                   finalizer: typing.Callable[[typing.Any], typing.Any] = None) -> None:
+        """
+        Load a file (or a bundle entry) into target_dict[key_name].
+
+        In lazy mode, nothing is read until target_dict[key_name] is first accessed.
+        In parallel mode, the loader runs on the worker pool and the finalizer is applied on the main thread
+        when the pending files are resolved.
+        """
+
+        if cls._lazy:
+            target_dict.set_lazy(key_name, functools.partial(cls._load_now, loader, source, finalizer))
+            return
+
+        if cls._executor is None:
+            resource = loader(source)
+            target_dict[key_name] = resource if finalizer is None else finalizer(resource)
+            return
+
+        cls._pending.append((target_dict, key_name, cls._executor.submit(loader, source), finalizer))
+
+    @staticmethod
+    def _load_now(loader: typing.Callable[[typing.Any], typing.Any],
+                  source: PathLike | dict[str, ...],
+                  finalizer: typing.Callable[[typing.Any], typing.Any] = None) -> typing.Any:
+
+        resource = loader(source)
+        return resource if finalizer is None else finalizer(resource)
+
+    @classmethod
+    def _resolve_pending(cls) -> None:
+        if cls._executor is None:
+            return
+
+        for target_dict, key_name, future, finalizer in cls._pending:
+            resource = future.result()
+            target_dict[key_name] = resource if finalizer is None else finalizer(resource)
+
+        cls._pending.clear()
+        cls._executor.shutdown()
+        cls._executor = None
+
     @classmethod
     def _get_default_assets_directory(cls):
         if cls.default_assets_directory is not None:
@@ -86,11 +251,55 @@ class Resource:
                     current_dict[key_name] |= cls._load_json(assets_path+elem.name)
 
                 elif elem.name.endswith(".csv"):
-                    current_dict[key_name] = cls._load_csv(assets_path+elem.name)
+                    cls._pending_csv.append((current_dict, key_name, assets_path+elem.name))
 
                 else:
                     raise InvalidFileFormatError(f"{elem.name.split('.')[-1]} is not a supported data file format")
 
+    @classmethod
+    def _load_bundle_data(cls) -> None:
+        for entry in cls.bundle.get_entries("data"):
+            if entry["kind"] == "json":
+                current_dict = cls._get_nested_dict(cls.data, entry["path"])
+                current_dict |= cls.bundle.load_json(entry)
+
+            elif entry["kind"] == "tilemap":
+                current_dict = cls._get_nested_dict(cls.data, entry["path"][:-1])
+                current_dict[entry["path"][-1]] = cls.bundle.load_tilemap(entry)
+
+            else:
+                raise InvalidFileFormatError(f"{entry['kind']} is not a supported bundle data entry")
+
+    @classmethod
+    def _load_bundle_files(cls) -> None:
+        for entry in cls.bundle.get_entries("image"):
+            cls._get_nested_dict(cls.data, ["image"] + entry["path"][:-1])
+            cls._load_file(cls._get_nested_dict(cls.image, entry["path"][:-1], LazyDict),
+                           entry["path"][-1],
+                           cls.bundle.load_image,
+                           entry,
+                           pygame.Surface.convert_alpha)
+
+        for entry in cls.bundle.get_entries("sound"):
+            cls._get_nested_dict(cls.data, ["sound"] + entry["path"][:-1])
+            cls._load_file(cls._get_nested_dict(cls.sound, entry["path"][:-1], LazyDict),
+                           entry["path"][-1],
+                           cls.bundle.load_sound,
+                           entry)
+
+    @staticmethod
+    def _get_nested_dict(root_dict: dict,
+                         path: list[str],
+                         dict_type: type = dict) -> dict:
+        """Return root_dict[path[0]][path[1]]..., creating missing levels."""
+
+        for key in path:
+            if key not in root_dict:
+                root_dict[key] = dict_type()
+            root_dict = root_dict[key]
+
+        return root_dict
+
     @classmethod
     def _load_json(cls,
                    file_path: PathLike) -> dict[str, ...]:
@@ -100,15 +309,73 @@ class Resource:
 
     @classmethod
     def _load_csv(cls,
-                  file_path: PathLike) -> list[list[int]]:
+                  file_path: PathLike) -> numpy.ndarray:
+        """
+        Load a csv tilemap as a 2D int16 array.
 
-        with open(file_path) as file:
-            return [list(map(int, rec)) for rec in csv.reader(file, delimiter=',')]
+        With the tilemap cache, the parsed tilemap is stored as a .npy file, valid as long as the source keeps the
+        same modification time or the same content hash, and memory-mapped copy-on-write on the next launches.
+        """
+
+        if cls.tilemap_cache is None:
+            with open(file_path) as file:
+                return cls._parse_csv(file, file_path)
+
+        cache_name = f"{os.path.basename(file_path)}-{DiskCache.hash_bytes(os.path.abspath(file_path).encode())[:8]}"
+        source_mtime = os.stat(file_path).st_mtime_ns
+        meta = cls.tilemap_cache.read_meta(cache_name) or {}
+
+        if meta.get("mtime") == source_mtime:
+            tilemap = cls._load_cached_tilemap(cache_name)
+            if tilemap is not None:
+                return tilemap
+
+        with open(file_path, "rb") as file:
+            source = file.read()
+        source_hash = DiskCache.hash_bytes(source)
+
+        if meta.get("hash") == source_hash:
+            tilemap = cls._load_cached_tilemap(cache_name)
+            if tilemap is not None:
+                cls.tilemap_cache.write_meta(cache_name, {"mtime": source_mtime, "hash": source_hash})
+                return tilemap
+
+        cls.tilemap_cache.misses += 1
+        tilemap = cls._parse_csv(io.StringIO(source.decode()), file_path)
+        with cls.tilemap_cache.open_for_write(cache_name, ".npy") as file:
+            numpy.save(file, tilemap)
+        cls.tilemap_cache.write_meta(cache_name, {"mtime": source_mtime, "hash": source_hash})
+
+        return tilemap
+
+    @classmethod
+    def _load_cached_tilemap(cls,
+                             cache_name: str) -> numpy.ndarray | None:
+        """Memory-map a cached tilemap, return None if it is missing or unreadable."""
+
+        try:
+            # Copy-on-write, so the tilemap can be edited like a parsed one without touching the cache.
+            tilemap = numpy.load(cls.tilemap_cache.get_path(cache_name, ".npy"), mmap_mode="c")
+
+        except (OSError, ValueError, EOFError):
+            return None
+
+        if tilemap.ndim != 2 or tilemap.dtype != numpy.int16:
+            return None
+
+        cls.tilemap_cache.hits += 1
+        return tilemap
+
+    @staticmethod
+    def _parse_csv(file: typing.TextIO,
+                   file_path: PathLike) -> numpy.ndarray:
+
+        return Bundle.parse_tilemap(file, os.path.basename(file_path))
 
     @classmethod
     def _load_image(cls,
                     assets_path: PathLike,
-                    current_image_dict: dict = None,
+                    current_image_dict: LazyDict = None,
                     current_data_dict: dict = None) -> None:
 
         if current_image_dict is None:
@@ -123,7 +390,7 @@ class Resource:
         for elem in os.scandir(assets_path):
             if elem.is_dir():
                 if elem.name not in current_image_dict:
-                    current_image_dict[elem.name] = {}
+                    current_image_dict[elem.name] = LazyDict()
 
                 if elem.name not in current_data_dict:
                     current_data_dict[elem.name] = {}
@@ -143,7 +410,11 @@ class Resource:
                     current_data_dict |= image_dict
 
                 elif any(elem.name.endswith(ext) for ext in [".png", ".jpg"]):
-                    current_image_dict[key_name] = pygame.image.load(assets_path + elem.name).convert_alpha()
+                    cls._load_file(current_image_dict,
+                                   key_name,
+                                   pygame.image.load,
+                                   assets_path + elem.name,
+                                   pygame.Surface.convert_alpha)
 
                 else:
                     raise InvalidFileFormatError(f"{elem.name.split('.')[-1]} is not a supported image file format")
@@ -151,7 +422,7 @@ class Resource:
     @classmethod
     def _load_sound(cls,
                     assets_path: PathLike,
-                    current_sound_dict: dict = None,
+                    current_sound_dict: LazyDict = None,
                     current_data_dict: dict = None) -> None:
 
         if current_sound_dict is None:
@@ -166,7 +437,7 @@ class Resource:
         for elem in os.scandir(assets_path):
             if elem.is_dir():
                 if elem.name not in current_sound_dict:
-                    current_sound_dict[elem.name] = {}
+                    current_sound_dict[elem.name] = LazyDict()
 
                 if elem.name not in current_data_dict:
                     current_data_dict[elem.name] = {}
@@ -180,7 +451,10 @@ class Resource:
                 key_name = "".join(elem.name.split(".")[:-1])
 
                 if any(elem.name.endswith(ext) for ext in [".wav", ".mp3", ".ogg"]):
-                    current_sound_dict[key_name] = pygame.mixer.Sound(assets_path + elem.name)
+                    cls._load_file(current_sound_dict,
+                                   key_name,
+                                   pygame.mixer.Sound,
+                                   assets_path + elem.name)
                     continue
 
                 if elem.name == "index.json":
@@ -194,7 +468,7 @@ class Resource:
 
     @classmethod
     def _cache(cls,
-               surf_dict: dict = None,
+               surf_dict: LazyDict = None,
                data_dict: dict = None) -> None:
 
         if not cls.data["engine"]["resource"]["surface"]["caching"]["enabled"]:
@@ -206,19 +480,85 @@ class Resource:
         if surf_dict is None:
             surf_dict = cls.image
             data_dict = cls.data["image"]
+            CachedSurface.set_memory_budget(cls.data["engine"]["resource"]["surface"]["caching"]["memory_budget"])
 
         for image_key in data_dict:
             if image_key in surf_dict:
-                if isinstance(surf_dict[image_key], dict):
+                if surf_dict.is_loaded(image_key) and isinstance(surf_dict[image_key], LazyDict):
                     cls._cache(surf_dict[image_key], data_dict[image_key])
 
                 if "cached" in data_dict[image_key] and data_dict[image_key]["cached"] is True:
-                    surf_dict[image_key] = cls._cache_image(surf_dict[image_key], data_dict[image_key])
+                    surf_dict.transform(image_key, functools.partial(cls._cache_image,
+                                                                     surf_dict_param=data_dict[image_key]))
+
+    @classmethod
+    def build_atlas(cls,
+                    directories: list[str] = None,
+                    sheet_size: tuple[int, int] = (1024, 1024)) -> None:
+        """
+        Pack the rotation frames of every cached image into a single atlas.
+
+        Only images under the given top-level image directories are packed (all of them if None),
+        image files at the top level are not. Images not loaded yet are packed when they load,
+        on sheets of their own. Lazily rotated cached surfaces are skipped.
+        """
+
+        cached_surfaces = []
+        for directory in cls.image:
+            if not cls.image.is_loaded(directory) or not isinstance(cls.image[directory], LazyDict):
+                continue
+
+            if directories is None or directory in directories:
+                cached_surfaces.extend(cls._find_cached_surfaces(cls.image[directory], cls.data["image"][directory]))
+
+        cls.atlas = SurfaceAtlas(sheet_size)
+        handles = cls.atlas.pack([frame for cached_surface in cached_surfaces for frame in cached_surface.surfaces])
+
+        for cached_surface in cached_surfaces:
+            cached_surface.move_to_atlas(cls.atlas, handles[:len(cached_surface.surfaces)])
+            handles = handles[len(cached_surface.surfaces):]
+
+    @classmethod
+    def _find_cached_surfaces(cls,
+                              surf_dict: LazyDict,
+                              data_dict: dict) -> list[CachedSurface]:
+        """Return the loaded cached surfaces, and make the ones not loaded yet join the atlas once loaded."""
+
+        cached_surfaces = []
+
+        for image_key in data_dict:
+            if image_key not in surf_dict:
+                continue
+
+            if surf_dict.is_loaded(image_key) and isinstance(surf_dict[image_key], LazyDict):
+                cached_surfaces.extend(cls._find_cached_surfaces(surf_dict[image_key], data_dict[image_key]))
+
+            elif "cached" in data_dict[image_key] and data_dict[image_key]["cached"] is True:
+                if not surf_dict.is_loaded(image_key):
+                    surf_dict.transform(image_key, cls._add_to_atlas)
+
+                elif cls._is_packable(surf_dict[image_key]):
+                    cached_surfaces.append(surf_dict[image_key])
+
+        return cached_surfaces
+
+    @classmethod
+    def _add_to_atlas(cls,
+                      surf: pygame.Surface) -> pygame.Surface:
+
+        if cls.atlas is not None and cls._is_packable(surf):
+            surf.move_to_atlas(cls.atlas, cls.atlas.pack(surf.surfaces))
+
+        return surf
+
+    @staticmethod
+    def _is_packable(surf: pygame.Surface) -> bool:
+        return isinstance(surf, CachedSurface) and surf.atlas_frames is None and None not in surf.surfaces
 
     @classmethod
     def set_volume(cls,
                    master_volume: float = None,
-                   sound_dict: dict = None,
+                   sound_dict: LazyDict = None,
                    data_dict: dict = None) -> None:
 
         if master_volume is None:
@@ -229,23 +569,36 @@ class Resource:
             data_dict = cls.data["sound"]
 
         for key in sound_dict:
-            if isinstance(sound_dict[key], dict):
+            if sound_dict.is_loaded(key) and isinstance(sound_dict[key], LazyDict):
                 cls.set_volume(master_volume,
                                sound_dict[key],
                                data_dict[key])
                 continue
 
             individual_sound_volume = data_dict[key] if key in data_dict else 1
-            sound_dict[key].set_volume(master_volume*individual_sound_volume)
+            sound_dict.transform(key, functools.partial(cls._set_sound_volume,
+                                                        volume=master_volume*individual_sound_volume))
+
+    @staticmethod
+    def _set_sound_volume(sound: pygame.mixer.Sound,
+                          volume: float) -> pygame.mixer.Sound:
+
+        sound.set_volume(volume)
+        return sound
 
     @classmethod
     def _cache_image(cls,
                      surf: pygame.Surface,
                      surf_dict_param: dict[str, ...]) -> CachedSurface:
 
+        caching_params = cls.data["engine"]["resource"]["surface"]["caching"]
+
         if "cache_size" in surf_dict_param:
             cache_size = surf_dict_param["cache_size"]
         else:
-            cache_size = cls.data["engine"]["resource"]["surface"]["caching"]["default_size"]
+            cache_size = caching_params["default_size"]
+
+        if caching_params["lazy"]:
+            return CachedSurface(surf, cache_size, lazy=True)
 
-        return CachedSurface(surf, cache_size)
+        return CachedSurface(surf, cache_size, cls.rotation_cache)
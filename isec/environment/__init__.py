@@ -1,4 +1,4 @@
 from isec.environment.scene import EntityScene, TilemapScene
-from isec.environment.base import Entity, Sprite, Pos
+from isec.environment.base import Entity, Sprite, Pos, EntityPool
 
-__all__ = [EntityScene, TilemapScene, Entity, Sprite, Pos]
+__all__ = [EntityScene, TilemapScene, Entity, Sprite, Pos, EntityPool]
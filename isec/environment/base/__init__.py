@@ -2,5 +2,8 @@ from isec.environment.base.sprite import Sprite
 from isec.environment.base.pos import Pos
 from isec.environment.base.entity import Entity
 from isec.environment.base.rendering_techniques import RenderingTechniques
+from isec.environment.base.render_queue import RenderQueue
+from isec.environment.base.entity_registry import EntityRegistry
+from isec.environment.base.entity_pool import EntityPool
 
-__all__ = ["Sprite", "Pos", "Entity", "RenderingTechniques"]
+__all__ = ["Sprite", "Pos", "Entity", "RenderingTechniques", "RenderQueue", "EntityRegistry", "EntityPool"]
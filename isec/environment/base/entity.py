@@ -1,3 +1,4 @@
+import typing
 import pygame
 
 from collections.abc import Iterable
@@ -5,8 +6,14 @@ from collections.abc import Iterable
 from isec.environment.base.pos import Pos
 from isec.environment.base.sprite import Sprite
 
+if typing.TYPE_CHECKING:
+    from isec.environment.base.entity_pool import EntityPool
+
 
 class Entity:
+    cullable: bool = True  # False for entities drawing outside of their sprite.max_rect, so they are never culled.
+    pool: "EntityPool | None" = None  # Set on entities acquired from an EntityPool.
+
     def __init__(self,
                  position: Pos,
                  sprite: Sprite) -> None:
@@ -15,6 +22,11 @@ class Entity:
         self.position: Pos = position
         self.sprite: Sprite = sprite
 
+    def reset(self) -> None:
+        """Make a released entity usable again. Pooled entity types extend it with the arguments of __init__."""
+
+        self.to_delete = False
+
     def update(self,
                delta: float) -> None:
         """Update elements of this container."""
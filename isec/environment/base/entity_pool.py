@@ -0,0 +1,148 @@
+from isec.environment.base.entity import Entity
+
+
+class EntityPool:
+    """
+    Entities of entity_type handed out again once released, instead of allocating new ones.
+
+    acquire creates an entity with its arguments when none is free, otherwise it calls the reset method of
+    a free one with them, so entity_type.reset takes the arguments of __init__ and reuses the entity position
+    and sprite when it can. EntityScene releases the pooled entities it removes because of to_delete.
+    At most capacity entities are kept free, the others are left to the garbage collector.
+    """
+
+    def __init__(self,
+                 entity_type: type[Entity],
+                 capacity: int = 64) -> None:
+
+        if capacity < 0:
+            raise ValueError("Capacity must be positive.")
+
+        self.entity_type = entity_type
+        self.capacity = capacity
+        self._free: dict[Entity, None] = {}
+
+        self.allocated = 0
+        self.reused = 0
+        self.discarded = 0
+
+    @property
+    def free_count(self) -> int:
+        return len(self._free)
+
+    def acquire(self,
+                *args,
+                **kwargs) -> Entity:
+
+        if self._free:
+            entity, _ = self._free.popitem()
+            entity.reset(*args, **kwargs)
+            self.reused += 1
+            return entity
+
+        entity = self.entity_type(*args, **kwargs)
+        entity.pool = self
+        self.allocated += 1
+
+        return entity
+
+    def release(self,
+                entity: Entity) -> None:
+        """Give the entity back. It must not be used anymore until acquired again."""
+
+        if entity.pool is not self:
+            raise ValueError("Entity was not acquired from this pool.")
+
+        if entity in self._free:
+            return
+
+        if len(self._free) >= self.capacity:
+            self.discarded += 1
+            return
+
+        self._free[entity] = None
+
+    def clear(self) -> None:
+        self._free.clear()
+
+    def report(self) -> str:
+        return (f"{self.entity_type.__name__} pool: {self.allocated} allocated, {self.reused} reused, "
+                f"{self.discarded} discarded, {self.free_count} free")
+
+
+if __name__ == '__main__':
+    import gc
+    import time
+    import pygame
+
+    from isec.environment.base.sprite import Sprite
+    from isec.environment.scene.entity_scene import EntityScene
+    from isec.environment.position.simple_pos import SimplePos
+
+    surface = pygame.Surface((4, 4))
+
+    class Spark(Entity):
+        """A short-lived entity, as transitions and blobs are, at a much higher rate."""
+
+        def __init__(self,
+                     position: tuple[float, float],
+                     speed: tuple[float, float],
+                     lifetime: float) -> None:
+
+            super().__init__(SimplePos(position, speed), Sprite(surface))
+            self.lifetime = lifetime
+
+        def reset(self,
+                  position: tuple[float, float],
+                  speed: tuple[float, float],
+                  lifetime: float) -> None:
+
+            super().reset()
+            self.position.position.update(position)
+            self.position.speed.update(speed)
+            self.lifetime = lifetime
+
+        def update(self,
+                   delta: float) -> None:
+
+            super().update(delta)
+            self.lifetime -= delta
+            if self.lifetime <= 0:
+                self.to_delete = True
+
+    def simulate(pool: EntityPool | None,
+                 frames: int = 3000,
+                 spawn_per_frame: int = 20) -> tuple[int, int, float]:
+        """Sustained spawn at 60 fps, return the sparks allocated, the gen 0 collections and the time."""
+
+        scene = EntityScene(fps=60, surface=pygame.Surface((400, 300)))
+        allocated = 0
+        collections = gc.get_stats()[0]["collections"]
+        start = time.perf_counter()
+
+        for frame in range(frames):
+            sparks = []
+            for i in range(spawn_per_frame):
+                args = ((frame, i), (i, -frame % 7), 0.25 + i / spawn_per_frame)
+                if pool is None:
+                    sparks.append(Spark(*args))
+                    allocated += 1
+                else:
+                    sparks.append(pool.acquire(*args))
+
+            scene.add_entities(*sparks)
+            scene.update(1 / 60)
+
+        elapsed = time.perf_counter() - start
+        if pool is not None:
+            allocated = pool.allocated
+
+        return allocated, gc.get_stats()[0]["collections"] - collections, elapsed
+
+    simulated_seconds = 3000 / 60
+    for name, spark_pool in (("no pool", None), ("pool", EntityPool(Spark, capacity=256))):
+        allocation_count, collection_count, duration = simulate(spark_pool)
+        print(f"{name:>8}: {allocation_count / simulated_seconds:>7.1f} allocations/s (simulated), "
+              f"{collection_count} gen 0 collections, {duration * 1000:.0f} ms")
+        if spark_pool is not None:
+            print(spark_pool.report())
@@ -0,0 +1,160 @@
+from collections.abc import Iterable
+
+from isec.environment.base.entity import Entity
+
+
+class EntityRegistry:
+    """
+    Entities in insertion order, with O(1) membership, addition and removal.
+
+    Each entity gets a handle when added: an integer never given to another entity, so a handle kept after
+    its entity was removed resolves to None instead of another entity. Handles also give the insertion order.
+    Removed entities leave the ordered list on its next read, in one pass whatever the number of removals.
+    Entities are also indexed by type.
+    """
+
+    def __init__(self,
+                 entities: Iterable[Entity] = ()) -> None:
+
+        self._handles: dict[Entity, int] = {}
+        self._entities_by_handle: dict[int, Entity] = {}
+        self._entities_by_type: dict[type, dict[Entity, None]] = {}
+
+        self._order: list[int] = []
+        self._entities: list[Entity] | None = []
+        self._next_handle = 0
+
+        for entity in entities:
+            self.add(entity)
+
+    @property
+    def entities(self) -> list[Entity]:
+        """The entities, in insertion order. The list is rebuilt after removals, don't mutate it."""
+
+        if self._entities is None:
+            self._order = [handle for handle in self._order if handle in self._entities_by_handle]
+            self._entities = [self._entities_by_handle[handle] for handle in self._order]
+
+        return self._entities
+
+    def add(self,
+            entity: Entity) -> int:
+        """Add the entity if it is not already there, and return its handle."""
+
+        if entity in self._handles:
+            return self._handles[entity]
+
+        handle = self._next_handle
+        self._next_handle += 1
+
+        self._handles[entity] = handle
+        self._entities_by_handle[handle] = entity
+        self._entities_by_type.setdefault(type(entity), {})[entity] = None
+
+        self._order.append(handle)
+        if self._entities is not None:
+            self._entities.append(entity)
+
+        return handle
+
+    def remove(self,
+               entity: Entity) -> bool:
+        """Remove the entity, return whether it was there."""
+
+        handle = self._handles.pop(entity, None)
+        if handle is None:
+            return False
+
+        del self._entities_by_handle[handle]
+        del self._entities_by_type[type(entity)][entity]
+        self._entities = None
+
+        return True
+
+    def get_handle(self,
+                   entity: Entity) -> int | None:
+
+        return self._handles.get(entity)
+
+    def get_entity(self,
+                   handle: int) -> Entity | None:
+
+        return self._entities_by_handle.get(handle)
+
+    def get_entities_by_type(self,
+                             entity_type: type) -> list[Entity]:
+        """Return the instances of entity_type, subclasses included, in insertion order."""
+
+        entities = [entity
+                    for indexed_type, typed_entities in self._entities_by_type.items()
+                    if issubclass(indexed_type, entity_type)
+                    for entity in typed_entities]
+
+        return sorted(entities, key=self._handles.__getitem__)
+
+    def get_entities_by_name(self,
+                             name: str) -> list[Entity]:
+        """Return the entities whose class is named name, in insertion order."""
+
+        entities = [entity
+                    for indexed_type, typed_entities in self._entities_by_type.items()
+                    if indexed_type.__name__ == name
+                    for entity in typed_entities]
+
+        return sorted(entities, key=self._handles.__getitem__)
+
+    def __contains__(self,
+                     entity: Entity) -> bool:
+
+        return entity in self._handles
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+
+if __name__ == '__main__':
+    import timeit
+    import pygame
+
+    from isec.environment.base.pos import Pos
+    from isec.environment.base.sprite import Sprite
+
+    surface = pygame.Surface((1, 1))
+
+    def legacy_spawn_and_expire(entities: list[Entity],
+                                spawned: list[Entity]) -> None:
+        """The list membership tests and reversed list.remove sweep EntityScene used before."""
+
+        entities.extend([entity for entity in spawned if entity not in entities])
+        for entity in spawned:
+            entity.to_delete = True
+
+        for entity in reversed(entities):
+            if entity.to_delete:
+                entities.remove(entity)
+
+    def registry_spawn_and_expire(registry: EntityRegistry,
+                                  spawned: list[Entity]) -> None:
+
+        for entity in spawned:
+            if entity not in registry:
+                registry.add(entity)
+        for entity in spawned:
+            entity.to_delete = True
+
+        for entity in [entity for entity in registry.entities if entity.to_delete]:
+            registry.remove(entity)
+        len(registry.entities)
+
+    for count in (100, 1000, 5000):
+        resident = [Entity(Pos(), Sprite(surface)) for _ in range(count)]
+        batch = [Entity(Pos(), Sprite(surface)) for _ in range(count)]
+
+        legacy_time = timeit.timeit(lambda: legacy_spawn_and_expire(list(resident), batch), number=3) / 3
+        registry_time = timeit.timeit(lambda: registry_spawn_and_expire(EntityRegistry(resident), batch),
+                                      number=3) / 3
+        print(f"{count} entities spawned and expired among {count}: "
+              f"legacy {legacy_time*1000:.2f} ms, registry {registry_time*1000:.2f} ms")
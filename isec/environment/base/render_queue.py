@@ -0,0 +1,47 @@
+import itertools
+import pygame
+
+from collections.abc import Iterable
+
+
+class RenderQueue:
+    """
+    Stands in for a destination surface while a scene is rendered.
+
+    Blits are only recorded, then flush() submits them to the surface in the same order.
+    Consecutive blits sharing a blit flag are submitted in one call: fblits when they blit whole surfaces,
+    blits when they use an area (atlas frames).
+    """
+
+    def __init__(self,
+                 surface: pygame.Surface) -> None:
+
+        self.surface = surface
+        self._entries: list[tuple[pygame.Surface, Iterable, pygame.Rect | None, int]] = []
+
+    def blit(self,
+             source: pygame.Surface,
+             dest: Iterable,
+             area: pygame.Rect = None,
+             special_flags: int = 0) -> None:
+
+        self._entries.append((source, dest, area, special_flags))
+
+    def fblits(self,
+               blit_sequence: Iterable[tuple[pygame.Surface, Iterable]],
+               special_flags: int = 0) -> None:
+
+        self._entries.extend((source, dest, None, special_flags) for source, dest in blit_sequence)
+
+    def flush(self) -> None:
+        for (special_flags, whole_surface), entries in itertools.groupby(self._entries,
+                                                                         key=lambda e: (e[3], e[2] is None)):
+            if whole_surface:
+                self.surface.fblits([(source, dest) for source, dest, _area, _flags in entries], special_flags)
+            else:
+                self.surface.blits(entries, doreturn=False)
+
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -71,4 +71,9 @@ class RenderingTechniques:
         if not self.effective_rect.colliderect(destination_rect):
             return
 
-        destination.blit(self.effective_surf, self.effective_rect, special_flags=self.blit_flag)
+        if self.surface.atlas_frames is None:
+            destination.blit(self.effective_surf, self.effective_rect, special_flags=self.blit_flag)
+            return
+
+        sheet, area = self.surface.get_atlas_frame(angle)
+        destination.blit(sheet, self.effective_rect, area, special_flags=self.blit_flag)
@@ -0,0 +1,110 @@
+import pygame
+
+from collections.abc import Hashable
+
+
+class SpatialHash:
+    """
+    A uniform grid bucketing items by the cells their rect overlaps.
+
+    Querying a rect only visits the buckets of the cells it overlaps,
+    so the cost depends on what is inside the rect and not on the total number of items.
+    """
+
+    def __init__(self,
+                 cell_size: int = 256) -> None:
+
+        if cell_size <= 0:
+            raise ValueError("Cell size must be greater than 0.")
+
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], set[Hashable]] = {}
+        self._item_cells: dict[Hashable, tuple[int, int, int, int]] = {}
+
+    def _get_cell_range(self,
+                        rect: pygame.Rect) -> tuple[int, int, int, int]:
+
+        return (rect.left // self.cell_size,
+                rect.top // self.cell_size,
+                (rect.right - 1) // self.cell_size,
+                (rect.bottom - 1) // self.cell_size)
+
+    def insert(self,
+               item: Hashable,
+               rect: pygame.Rect) -> None:
+
+        if item in self._item_cells:
+            self.move(item, rect)
+            return
+
+        cell_range = self._get_cell_range(rect)
+        self._item_cells[item] = cell_range
+        self._add_to_cells(item, cell_range)
+
+    def move(self,
+             item: Hashable,
+             rect: pygame.Rect) -> None:
+        """Update the cells of an item. Nothing is done if it still overlaps the same cells."""
+
+        cell_range = self._get_cell_range(rect)
+        old_cell_range = self._item_cells[item]
+
+        if cell_range == old_cell_range:
+            return
+
+        self._remove_from_cells(item, old_cell_range)
+        self._item_cells[item] = cell_range
+        self._add_to_cells(item, cell_range)
+
+    def remove(self,
+               item: Hashable) -> None:
+
+        cell_range = self._item_cells.pop(item, None)
+        if cell_range is not None:
+            self._remove_from_cells(item, cell_range)
+
+    def query(self,
+              rect: pygame.Rect) -> set[Hashable]:
+        """Return every item whose cells overlap rect."""
+
+        left, top, right, bottom = self._get_cell_range(rect)
+        items = set()
+
+        for cell_x in range(left, right+1):
+            for cell_y in range(top, bottom+1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket:
+                    items.update(bucket)
+
+        return items
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self._item_cells.clear()
+
+    def _add_to_cells(self,
+                      item: Hashable,
+                      cell_range: tuple[int, int, int, int]) -> None:
+
+        left, top, right, bottom = cell_range
+        for cell_x in range(left, right+1):
+            for cell_y in range(top, bottom+1):
+                self.cells.setdefault((cell_x, cell_y), set()).add(item)
+
+    def _remove_from_cells(self,
+                           item: Hashable,
+                           cell_range: tuple[int, int, int, int]) -> None:
+
+        left, top, right, bottom = cell_range
+        for cell_x in range(left, right+1):
+            for cell_y in range(top, bottom+1):
+                bucket = self.cells[(cell_x, cell_y)]
+                bucket.discard(item)
+                if not bucket:
+                    del self.cells[(cell_x, cell_y)]
+
+    def __contains__(self, item):
+        return item in self._item_cells
+
+    def __len__(self):
+        return len(self._item_cells)
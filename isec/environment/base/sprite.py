@@ -24,10 +24,8 @@ class Sprite:
 
         self.surface = surface
         self.rect = self.surface.get_rect()
-        self.max_rect = self.rect.copy()
-        self.max_rect.width = math.ceil(self.max_rect.width * math.sqrt(2))
-        self.max_rect.height = math.ceil(self.max_rect.height * math.sqrt(2))
-        self.rect.center = self.max_rect.center = 0, 0
+        self.max_rect = self.get_max_rect(self.surface)
+        self.rect.center = 0, 0
 
         self.effective_surf = self.surface
         self.effective_rect = self.rect
@@ -41,6 +39,17 @@ class Sprite:
 
         pass
 
+    @staticmethod
+    def get_max_rect(surface: pygame.Surface) -> pygame.Rect:
+        """Return a rect centered on (0, 0) containing the surface rotated by any angle."""
+
+        # Rotating adds up to a pixel on each side of the diagonal.
+        size = math.ceil(math.hypot(*surface.get_size())) + 2
+        max_rect = pygame.Rect(0, 0, size, size)
+        max_rect.center = 0, 0
+
+        return max_rect
+
     def set_rendering_technique(self,
                                 rendering_technique: typing.Literal["static", "rotated", "cached"]) -> None:
 
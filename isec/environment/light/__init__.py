@@ -0,0 +1,5 @@
+from isec.environment.light.light import Light
+from isec.environment.light.light_scene import LightScene
+
+
+__all__ = [Light, LightScene]
@@ -0,0 +1,55 @@
+import numpy
+import pygame
+
+from isec.environment.base.pos import Pos
+
+
+class Light:
+    """
+    A point light, or a cone light if opening_angle is lower than 360.
+
+    The light follows position. A cone is centered on -position.a, like the sprites rotation.
+    Rays are cast from the light to find its lit area, ray_count rays being spread over the opening angle.
+    """
+
+    def __init__(self,
+                 position: Pos,
+                 radius: float,
+                 color: tuple[int, int, int] = (255, 255, 255),
+                 opening_angle: float = 360,
+                 ray_count: int = 90) -> None:
+
+        if radius <= 0:
+            raise ValueError("Radius must be greater than 0.")
+
+        if not 0 < opening_angle <= 360:
+            raise ValueError("Opening angle must be in ]0, 360].")
+
+        if ray_count < 3:
+            raise ValueError("Ray count must be at least 3.")
+
+        self.position = position
+        self.radius = radius
+        self.color = tuple(color)
+        self.opening_angle = opening_angle
+        self.ray_count = ray_count
+        self.enabled = True
+
+        # Last rendered light surface, with what it depends on.
+        self.cache_key: tuple | None = None
+        self.cache_surface: pygame.Surface | None = None
+
+    @property
+    def is_cone(self) -> bool:
+        return self.opening_angle < 360
+
+    def get_ray_angles(self) -> numpy.ndarray:
+        if not self.is_cone:
+            return numpy.arange(self.ray_count) * 360 / self.ray_count
+
+        return -self.position.a - self.opening_angle/2 + numpy.arange(self.ray_count) * \
+            self.opening_angle/(self.ray_count - 1)
+
+    def __repr__(self):
+        kind = f"Cone light ({self.opening_angle} degrees)" if self.is_cone else "Point light"
+        return f'{kind} of radius {self.radius} at {tuple(self.position.position)}'
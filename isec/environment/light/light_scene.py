@@ -0,0 +1,219 @@
+import pygame
+import numpy
+import math
+
+from isec.environment.base.scene import Scene, Camera
+from isec.environment.light.light import Light
+from isec.environment.tile_utils.tile_raycaster import TileRaycaster
+from isec.instance.handlers.frame_profiler import FrameProfiler
+
+
+class LightScene(Scene):
+    """
+    A scene compositing lights against a tile occlusion grid.
+
+    Lights are drawn at resolution_scale times the scene resolution in a single light map,
+    which is blurred and upscaled once, then blitted on the scene surface with blit_flag:
+    BLEND_ADD to add light on top of the scene, BLEND_MULT with an ambient color to darken what is not lit.
+
+    The surface of each light is kept while the light, and the occluders within its radius, don't change.
+    Light positions are snapped to the light map pixels, so a light moving by less than a pixel is not redrawn.
+    """
+
+    def __init__(self,
+                 occupancy: list[list[bool]] | numpy.ndarray,
+                 tile_size: int,
+                 surface: pygame.Surface = None,
+                 camera: Camera = None,
+                 resolution_scale: float = 0.5,
+                 ambient_color: tuple[int, int, int] = (0, 0, 0),
+                 blur_radius: int = 1,
+                 blit_flag: int = pygame.BLEND_ADD) -> None:
+
+        super().__init__(surface, camera)
+
+        if not 0 < resolution_scale <= 1:
+            raise ValueError("Resolution scale must be in ]0, 1].")
+
+        self.raycaster = TileRaycaster(occupancy)
+        self.tile_size = tile_size
+        self.resolution_scale = resolution_scale
+        self.ambient_color = ambient_color
+        self.blur_radius = blur_radius
+        self.blit_flag = blit_flag
+
+        self.lights: list[Light] = []
+        self.light_map = pygame.Surface((math.ceil(self.rect.width * resolution_scale),
+                                         math.ceil(self.rect.height * resolution_scale)))
+
+        self.hits = 0
+        self.misses = 0
+        self._falloff_surfaces: dict[tuple[int, tuple[int, int, int]], pygame.Surface] = {}
+
+    def add_lights(self,
+                   *lights: Light) -> None:
+
+        self.lights.extend([light for light in lights if light not in self.lights])
+
+    def remove_lights(self,
+                      *lights: Light) -> None:
+
+        for light in lights:
+            if light in self.lights:
+                self.lights.remove(light)
+
+    def set_occupancy(self,
+                      occupancy: list[list[bool]] | numpy.ndarray) -> None:
+        """Replace the occlusion grid. Lights near changed tiles are redrawn on the next render."""
+
+        self.raycaster = TileRaycaster(occupancy)
+
+    @FrameProfiler.measure("render")
+    def render(self,
+               camera: Camera = None) -> None:
+
+        if camera is None:
+            camera = self.camera
+
+        self.light_map.fill(self.ambient_color)
+        view_rect = self.rect.move(camera.position.position)
+        blits = []
+
+        for light in self.lights:
+            if not light.enabled:
+                continue
+
+            light_rect = pygame.Rect(0, 0, light.radius*2, light.radius*2)
+            light_rect.center = light.position.position
+            if not light_rect.colliderect(view_rect):
+                continue
+
+            # Light map pixel of the light.
+            light_pixel = (round(light.position.position[0] * self.resolution_scale),
+                           round(light.position.position[1] * self.resolution_scale))
+
+            light_surface = self._get_light_surface(light, light_pixel)
+            half_size = light_surface.get_width() // 2
+            blits.append((light_surface,
+                          (light_pixel[0] - round(camera.position.position[0] * self.resolution_scale) - half_size,
+                           light_pixel[1] - round(camera.position.position[1] * self.resolution_scale) - half_size)))
+
+        self.light_map.fblits(blits, pygame.BLEND_ADD)
+
+        light_map = self.light_map
+        if self.blur_radius > 0:
+            light_map = pygame.transform.box_blur(light_map, self.blur_radius)
+
+        self.surface.blit(pygame.transform.smoothscale(light_map, self.rect.size),
+                          self.rect,
+                          special_flags=self.blit_flag)
+
+    def _get_occluders(self,
+                       light: Light,
+                       light_position: tuple[float, float]) -> bytes:
+        """Return the occlusion tiles within the radius of the light."""
+
+        height, width = self.raycaster.occupancy.shape
+        start_x = max(0, math.floor((light_position[0] - light.radius) / self.tile_size) - 1)
+        start_y = max(0, math.floor((light_position[1] - light.radius) / self.tile_size) - 1)
+        end_x = min(width, math.ceil((light_position[0] + light.radius) / self.tile_size) + 2)
+        end_y = min(height, math.ceil((light_position[1] + light.radius) / self.tile_size) + 2)
+
+        return self.raycaster.occupancy[start_y:end_y, start_x:end_x].tobytes()
+
+    def _get_light_surface(self,
+                           light: Light,
+                           light_pixel: tuple[int, int]) -> pygame.Surface:
+
+        light_position = light_pixel[0] / self.resolution_scale, light_pixel[1] / self.resolution_scale
+        angle = light.position.a if light.is_cone else 0
+
+        cache_key = (light_pixel, angle, light.radius, light.color, light.opening_angle, light.ray_count,
+                     self.resolution_scale, self._get_occluders(light, light_position))
+
+        if cache_key == light.cache_key:
+            self.hits += 1
+            return light.cache_surface
+
+        self.misses += 1
+        light.cache_key = cache_key
+        light.cache_surface = self._render_light(light, light_position)
+
+        return light.cache_surface
+
+    def _render_light(self,
+                      light: Light,
+                      light_position: tuple[float, float]) -> pygame.Surface:
+        """Draw the lit area of the light, shaded by its falloff, at the light map resolution."""
+
+        scaled_radius = math.ceil(light.radius * self.resolution_scale)
+        light_surface = pygame.Surface((scaled_radius*2 + 1, scaled_radius*2 + 1))
+
+        directions = TileRaycaster.get_directions(light.get_ray_angles())
+        max_distance = light.radius / self.tile_size
+        distances, _hits = self.raycaster.cast((light_position[0] / self.tile_size,
+                                                light_position[1] / self.tile_size),
+                                               directions,
+                                               max_distance)
+
+        scale = self.tile_size * self.resolution_scale
+        vertices = directions * numpy.minimum(distances, max_distance)[:, None] * scale + scaled_radius
+
+        if light.is_cone:
+            vertices = numpy.concatenate(([(scaled_radius, scaled_radius)], vertices))
+
+        pygame.draw.polygon(light_surface, (255, 255, 255), vertices.tolist())
+        light_surface.blit(self._get_falloff_surface(scaled_radius, light.color),
+                           (0, 0),
+                           special_flags=pygame.BLEND_MULT)
+
+        return light_surface
+
+    def _get_falloff_surface(self,
+                             scaled_radius: int,
+                             color: tuple[int, int, int]) -> pygame.Surface:
+        """Return the color of a light, fading linearly from its center to its radius."""
+
+        if (scaled_radius, color) not in self._falloff_surfaces:
+            coordinates = numpy.arange(scaled_radius*2 + 1) - scaled_radius
+            distances = numpy.hypot(coordinates[:, None], coordinates[None, :])
+            intensity = numpy.clip(1 - distances / max(scaled_radius, 1), 0, 1)
+
+            pixels = (intensity[:, :, None] * numpy.array(color)[None, None, :]).astype(numpy.uint8)
+            self._falloff_surfaces[(scaled_radius, color)] = pygame.surfarray.make_surface(pixels)
+
+        return self._falloff_surfaces[(scaled_radius, color)]
+
+    def report(self) -> str:
+        return f"{len(self.lights)} lights, {self.hits} cached renders, {self.misses} redraws"
+
+
+if __name__ == '__main__':
+    import timeit
+    import random
+
+    from isec.environment.base.pos import Pos
+
+    pygame.init()
+    pygame.display.set_mode((400, 300))
+
+    random.seed(0)
+    cave = [[random.random() < 0.05 for _ in range(200)] for _ in range(200)]
+
+    light_scene = LightScene(cave, 8)
+    torches = [Light(Pos((random.uniform(0, 400), random.uniform(0, 300))), 60, (255, 180, 80)) for _ in range(8)]
+    lantern = Light(Pos((200, 150)), 150, opening_angle=50)
+    light_scene.add_lights(*torches, lantern)
+
+    def render_moving_lantern():
+        lantern.position.a += 1
+        light_scene.render()
+
+    def render_uncached():
+        for light in light_scene.lights:
+            light.cache_key = None
+        light_scene.render()
+
+    print(f"Cached torches:   {timeit.timeit(render_moving_lantern, number=100) * 10:.2f} ms per frame")
+    print(f"Without caching:  {timeit.timeit(render_uncached, number=100) * 10:.2f} ms per frame")
+    print(light_scene.report())
@@ -0,0 +1,4 @@
+from isec.environment.particle.particle_emitter import ParticleEmitter
+
+
+__all__ = [ParticleEmitter]
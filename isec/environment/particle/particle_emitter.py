@@ -0,0 +1,155 @@
+import pygame
+import numpy
+
+from collections.abc import Iterable
+
+from isec.environment.base import Entity, Sprite, Pos
+
+
+class ParticleEmitter(Entity):
+    """
+    A fixed number of particles sharing one surface, stored in preallocated arrays.
+
+    Particles are spawned in the free slots, those whose lifetime ran out, and ones that find no free slot
+    are dropped. Each update moves every particle by its velocity, then applies acceleration (gravity,
+    buoyancy...) and damping (the part of the velocity kept after one second) to the velocities at once.
+    All live particles are drawn with a single fblits call, centered on their position.
+    """
+
+    cullable = False
+
+    def __init__(self,
+                 surface: pygame.Surface,
+                 capacity: int = 512,
+                 acceleration: tuple[float, float] = (0, 0),
+                 damping: float = 1,
+                 blit_flag: int = 0) -> None:
+
+        if capacity <= 0:
+            raise ValueError("Capacity must be greater than 0.")
+
+        self.capacity = capacity
+        self.acceleration = numpy.array(acceleration, dtype=float)
+        self.damping = damping
+
+        self.positions = numpy.zeros((capacity, 2))
+        self.velocities = numpy.zeros((capacity, 2))
+        self.lifetimes = numpy.zeros(capacity)   # Remaining seconds, the slot is free when <= 0.
+
+        self.spawned = 0
+        self.dropped = 0
+
+        super().__init__(Pos(), Sprite(surface, blit_flag=blit_flag))
+
+    @property
+    def live_count(self) -> int:
+        return int(numpy.count_nonzero(self.lifetimes > 0))
+
+    def emit(self,
+             positions: Iterable,
+             velocities: Iterable,
+             lifetimes: Iterable | float) -> None:
+        """Spawn particles. Positions, velocities and lifetimes are per particle, or shared by all of them."""
+
+        positions = numpy.asarray(positions, dtype=float).reshape(-1, 2)
+        velocities = numpy.asarray(velocities, dtype=float).reshape(-1, 2)
+        lifetimes = numpy.asarray(lifetimes, dtype=float).reshape(-1)
+
+        count = max(len(positions), len(velocities), len(lifetimes))
+        free_slots = numpy.flatnonzero(self.lifetimes <= 0)[:count]
+        spawned = len(free_slots)
+
+        self.dropped += count - spawned
+        self.spawned += spawned
+
+        self.positions[free_slots] = numpy.broadcast_to(positions, (count, 2))[:spawned]
+        self.velocities[free_slots] = numpy.broadcast_to(velocities, (count, 2))[:spawned]
+        self.lifetimes[free_slots] = numpy.broadcast_to(lifetimes, count)[:spawned]
+
+    def clear(self) -> None:
+        self.lifetimes[:] = 0
+
+    def update(self,
+               delta: float) -> None:
+
+        self.lifetimes -= delta
+        self.positions += self.velocities * delta
+        self.velocities += self.acceleration * delta
+        self.velocities *= self.damping ** delta
+
+    def render(self,
+               camera_offset: Iterable,
+               surface: pygame.Surface,
+               rect: pygame.Rect) -> None:
+
+        live = self.lifetimes > 0
+        if not live.any():
+            return
+
+        origin = (camera_offset[0] + self.sprite.rect.left, camera_offset[1] + self.sprite.rect.top)
+        destinations = (self.positions[live] + origin).astype(int)
+        blits = [(self.sprite.surface, destination) for destination in destinations.tolist()]
+
+        surface.fblits(blits, self.sprite.blit_flag)
+
+
+if __name__ == '__main__':
+    import timeit
+    import random
+
+    from isec.environment.position import SimplePos
+    from isec.environment.scene import EntityScene
+
+    pygame.init()
+    window = pygame.display.set_mode((400, 300))
+    bubble_surface = pygame.Surface((2, 2))
+
+    class LegacyBubble(Entity):
+        """The entity per particle Player used to spawn."""
+
+        def __init__(self):
+            speed = pygame.Vector2(random.randint(0, 1000)/20, 0).rotate(random.gauss(180, 60))
+            super().__init__(SimplePos((200, 150), speed), Sprite(bubble_surface))
+            self.lifetime = random.randint(100, 200) / 400
+
+        def update(self,
+                   delta: float) -> None:
+            super().update(delta)
+
+            damping = 0.05 ** delta
+            self.position.speed[0] *= damping
+            self.position.speed[1] = (self.position.speed[1] - 50 * delta) * damping
+
+            self.lifetime -= delta
+            if self.lifetime <= 0:
+                self.to_delete = True
+
+    for rate in (4, 16):
+        legacy_scene = EntityScene(60)
+        emitter_scene = EntityScene(60)
+        emitter = ParticleEmitter(bubble_surface, capacity=1024, acceleration=(0, -50), damping=0.05)
+        emitter_scene.add_entities(emitter)
+
+        def legacy_frame():
+            legacy_scene.add_entities(*[LegacyBubble() for _ in range(rate)])
+            legacy_scene.update(1/60)
+            legacy_scene.render()
+
+        def emitter_frame():
+            angles = numpy.radians(numpy.random.normal(180, 60, rate))
+            speeds = numpy.random.randint(0, 1001, rate) / 20
+            emitter.emit((200, 150),
+                         numpy.stack((numpy.cos(angles), numpy.sin(angles)), axis=-1) * speeds[:, None],
+                         numpy.random.randint(100, 201, rate) / 400)
+            emitter_scene.update(1/60)
+            emitter_scene.render()
+
+        # Particles live 0.25 to 0.5 seconds, 4 per frame is about a boosting submarine.
+        for frame in (legacy_frame, emitter_frame):
+            timeit.timeit(frame, number=60)
+
+        print(f"{rate} particles per frame:")
+        print(f"    Legacy entities:   {timeit.timeit(legacy_frame, number=600) / 600 * 1e6:.0f} µs per frame, "
+              f"{len(legacy_scene.entities)} live particles")
+        print(f"    Particle emitter:  {timeit.timeit(emitter_frame, number=600) / 600 * 1e6:.0f} µs per frame, "
+              f"{emitter.live_count} live particles")
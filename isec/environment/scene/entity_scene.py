@@ -4,7 +4,11 @@ import pymunk
 from isec.environment.base.scene import Scene
 from isec.environment.base.entity import Entity
 from isec.environment.base.camera import Camera
+from isec.environment.base.entity_registry import EntityRegistry
+from isec.environment.base.render_queue import RenderQueue
+from isec.environment.base.spatial_hash import SpatialHash
 from isec.environment.position.pymunk_pos import PymunkPos
+from isec.instance.handlers.frame_profiler import FrameProfiler
 
 
 class EntityScene(Scene):
@@ -12,62 +16,231 @@ class EntityScene(Scene):
                  fps: int,
                  surface: pygame.Surface = None,
                  entities: list[Entity] = None,
-                 camera: Camera = None) -> None:
+                 camera: Camera = None,
+                 render_queue: bool = False,
+                 culling_cell_size: int = None,
+                 cull_update: bool = False,
+                 fixed_timestep: bool = False,
+                 max_substeps: int = 5) -> None:
 
         super().__init__(surface, camera)
 
         if entities is None:
             entities = []
-        self.entities = entities
+        self.registry = EntityRegistry()
 
         self.avg_delta = 1 / fps
         self.space = pymunk.Space()
 
+        # When enabled, sprites blit into the queue, which is flushed in batches at the end of render.
+        self.render_queue = RenderQueue(self.surface) if render_queue else None
+
+        # When enabled, only entities whose sprite.max_rect overlaps the camera view are rendered (and updated,
+        # if cull_update is set). Entities are bucketed in a spatial hash, static ones only once when added.
+        self.spatial_hash = SpatialHash(culling_cell_size) if culling_cell_size is not None else None
+        self.cull_update = cull_update
+        self._moving_entities: set[Entity] = set()
+        self._unculled_entities: dict[Entity, None] = {}
+
+        for entity in entities:
+            self.registry.add(entity)
+            if self.spatial_hash is not None:
+                self._register_entity(entity, False)
+
+        # When enabled, update steps the simulation by avg_delta as many times as the real time elapsed allows,
+        # at most max_substeps times per frame, the time left over being dropped. Render draws entities between
+        # their positions before and after the last step, interpolation_alpha of the way.
+        if max_substeps < 1:
+            raise ValueError("Max substeps must be at least 1.")
+
+        self.fixed_timestep = fixed_timestep
+        self.max_substeps = max_substeps
+        self.interpolation_alpha = 1.0
+        self.substeps = 0
+        self._accumulator = 0.0
+        self._previous_positions: dict[Entity, pygame.Vector2] = {}
+
+    @property
+    def entities(self) -> list[Entity]:
+        """The entities of the scene, in the order they are updated and rendered."""
+
+        return self.registry.entities
+
     def add_entities(self,
-                     *entities) -> None:
+                     *entities,
+                     static: bool = False) -> None:
+        """Add entities to the scene. Static entities are never moved once added, which lets culling skip them."""
+
+        for entity in entities:
+            if entity in self.registry:
+                continue
 
-        self.entities.extend([entity for entity in entities
-                              if entity not in self.entities])
+            self.registry.add(entity)
+            if self.spatial_hash is not None:
+                self._register_entity(entity, static)
 
+        # Bodies and shapes know their space, checking it is O(1) where space.bodies and space.shapes are copies.
         for entity in entities:
             if isinstance(entity.position, PymunkPos):
-                if entity.position.body not in self.space.bodies:
+                if entity.position.body.space is not self.space:
                     self.space.add(entity.position.body)
-                self.space.add(*[shape for shape in entity.position.shapes if shape not in self.space.shapes])
+                self.space.add(*[shape for shape in entity.position.shapes if shape.space is not self.space])
 
     def remove_entities(self,
                         *entities) -> None:
+        """Remove entities from the scene. Pooled entities marked to_delete are released to their pool."""
 
         for entity in entities:
-            if entity not in self.entities:
+            if not self.registry.remove(entity):
                 continue
 
-            self.entities.remove(entity)
+            self._unregister_entity(entity)
+            self._previous_positions.pop(entity, None)
+
+            if entity.to_delete and entity.pool is not None:
+                entity.pool.release(entity)
 
     def remove_entities_by_name(self,
                                 name) -> None:
 
-        for entity in self.entities:
-            if entity.__class__.__name__ == name:
-                self.remove_entities(entity)
+        self.remove_entities(*self.registry.get_entities_by_name(name))
 
+    def get_entities_by_type(self,
+                             entity_type: type) -> list[Entity]:
+
+        return self.registry.get_entities_by_type(entity_type)
+
+    @FrameProfiler.measure("update")
     def update(self,
                delta: float) -> None:
 
+        if not self.fixed_timestep:
+            self.step()
+            return
+
+        self._accumulator += delta
+        self.substeps = 0
+
+        while self._accumulator >= self.avg_delta and self.substeps < self.max_substeps:
+            self._store_previous_positions()
+            self.step()
+            self._accumulator -= self.avg_delta
+            self.substeps += 1
+
+        if self._accumulator >= self.avg_delta:
+            self._accumulator %= self.avg_delta
+
+        self.interpolation_alpha = self._accumulator / self.avg_delta
+
+    def _store_previous_positions(self) -> None:
+        """Copy the entity positions in place, only entities without one yet get a new Vector2."""
+
+        previous_positions = self._previous_positions
         for entity in self.entities:
+            previous_position = previous_positions.get(entity)
+            if previous_position is None:
+                previous_positions[entity] = pygame.Vector2(entity.position.position)
+            else:
+                previous_position.update(entity.position.position)
+
+    def step(self) -> None:
+        """Advance the entities and the space by avg_delta."""
+
+        if self.spatial_hash is not None and self.cull_update:
+            updated_entities = self.get_visible_entities()
+        else:
+            updated_entities = self.entities
+
+        for entity in updated_entities:
             entity.update(self.avg_delta)
 
-        for entity in reversed(self.entities):
-            if entity.to_delete:
-                self.entities.remove(entity)
+        self.remove_entities(*[entity for entity in updated_entities if entity.to_delete])
+
+        with FrameProfiler.measure("physics"):
+            self.space.step(self.avg_delta)
 
-        self.space.step(self.avg_delta)
+        if self.spatial_hash is not None:
+            self._update_spatial_hash()
 
+    @FrameProfiler.measure("render")
     def render(self,
                camera: Camera = None) -> None:
 
         if camera is None:
             camera = self.camera
 
-        for entity in self.entities:
-            entity.render(camera.get_offset_pos(entity.position), self.surface, self.rect)
+        destination = self.surface if self.render_queue is None else self.render_queue
+
+        if self.spatial_hash is None:
+            rendered_entities = self.entities
+        else:
+            rendered_entities = self.get_visible_entities(camera)
+
+        if self.fixed_timestep:
+            for entity in rendered_entities:
+                entity.render(self.get_render_position(entity) - camera.position.position, destination, self.rect)
+        else:
+            for entity in rendered_entities:
+                entity.render(camera.get_offset_pos(entity.position), destination, self.rect)
+
+        if self.render_queue is not None:
+            self.render_queue.flush()
+
+    def get_render_position(self,
+                            entity: Entity) -> pygame.Vector2:
+        """Return where the entity is drawn, interpolated between the last two steps in fixed timestep mode."""
+
+        position = pygame.Vector2(entity.position.position)
+        if entity not in self._previous_positions:
+            return position
+
+        # Rounded, so entities stay on whole pixels, as the terrain does.
+        position = self._previous_positions[entity].lerp(position, self.interpolation_alpha)
+        return pygame.Vector2(round(position.x), round(position.y))
+
+    def get_visible_entities(self,
+                             camera: Camera = None) -> list[Entity]:
+        """Return the entities that may overlap the camera view, in scene order. Requires culling."""
+
+        if camera is None:
+            camera = self.camera
+
+        # One pixel of margin on each side, since sprites are placed on rounded coordinates.
+        view_rect = self.rect.move(camera.position.position).inflate(2, 2)
+
+        visible_entities = self.spatial_hash.query(view_rect)
+        visible_entities.update(self._unculled_entities)
+
+        return sorted(visible_entities, key=self.registry.get_handle)
+
+    def _get_culling_rect(self,
+                          entity: Entity) -> pygame.Rect:
+
+        return entity.sprite.max_rect.move(entity.position.position)
+
+    def _register_entity(self,
+                         entity: Entity,
+                         static: bool) -> None:
+
+        if not entity.cullable:
+            self._unculled_entities[entity] = None
+            return
+
+        if not static:
+            self._moving_entities.add(entity)
+
+        self.spatial_hash.insert(entity, self._get_culling_rect(entity))
+
+    def _unregister_entity(self,
+                           entity: Entity) -> None:
+
+        if self.spatial_hash is None:
+            return
+
+        self._moving_entities.discard(entity)
+        self._unculled_entities.pop(entity, None)
+        self.spatial_hash.remove(entity)
+
+    def _update_spatial_hash(self) -> None:
+        for entity in self._moving_entities:
+            self.spatial_hash.move(entity, self._get_culling_rect(entity))
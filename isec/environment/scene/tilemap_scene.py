@@ -1,23 +1,46 @@
+import collections
 import pygame
 import numpy
 import math
 
 from isec.environment.base.scene import Scene, Camera
+from isec.instance.handlers.frame_profiler import FrameProfiler
 
 
 class TilemapScene(Scene):
+    """
+    A scene rendering a grid of tiles.
+
+    The map is pre-rendered into chunks of chunk_size x chunk_size tiles, built the first time they are visible.
+    At most max_chunks chunks are kept, the least recently used being dropped first.
+    Chunks are rebuilt when one of their tiles is edited with set_tile.
+    If chunk_size is None, every visible tile is blitted on each frame instead.
+
+    The map is stored as a 2D int16 array, which still supports the legacy tilemap[y][x] indexing.
+    """
+
     EMPTY_TILE = -1
 
     def __init__(self,
                  tilemap: list[list[int]],
                  tileset: dict[int, pygame.Surface],
                  surface: pygame.Surface = None,
-                 camera: Camera = None) -> None:
+                 camera: Camera = None,
+                 chunk_size: int | None = 32,
+                 max_chunks: int = 64) -> None:
 
         super().__init__(surface, camera)
 
-        self.tilemap = tilemap
-        self.tilemap_size = len(tilemap[0]), len(tilemap)
+        try:
+            # Always a copy: the source may be a read-only memory-mapped array, or shared with other scenes.
+            self.tilemap: numpy.ndarray = numpy.array(tilemap, dtype=numpy.int16)
+        except ValueError as error:
+            raise ValueError("Tilemap must be rectangular") from error
+
+        if self.tilemap.ndim != 2:
+            raise ValueError("Tilemap must be rectangular")
+
+        self.tilemap_size = self.tilemap.shape[1], self.tilemap.shape[0]
         self.tileset = tileset
         self.tile_size = self.tileset[0].get_size()[0]
         self._inter_tile_distance = 0
@@ -26,8 +49,15 @@ class TilemapScene(Scene):
         if not self._check_tileset_validity():
             raise ValueError("Invalid tileset")
 
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError("Chunk size must be greater than 0.")
+
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self._chunks: collections.OrderedDict[tuple[int, int], pygame.Surface | None] = collections.OrderedDict()
+
     def _check_tileset_validity(self) -> bool:
-        return all(tile in self.tileset for row in self.tilemap for tile in row)
+        return bool(numpy.isin(numpy.unique(self.tilemap), list(self.tileset)).all())
 
     @property
     def inter_tile_distance(self):
@@ -39,7 +69,67 @@ class TilemapScene(Scene):
         self.tile_size = self.tileset[0].get_size()[0] + self.inter_tile_distance
         if self.tile_size <= 0:
             self.tile_size = 1
+        self.invalidate_chunks()
+
+    def set_tile(self,
+                 x: int,
+                 y: int,
+                 tile: int) -> None:
+
+        if tile not in self.tileset:
+            raise ValueError(f"Tile {tile} is not in the tileset")
+
+        self.tilemap[y, x] = tile
+
+        if self.chunk_size is not None:
+            self._chunks.pop((x // self.chunk_size, y // self.chunk_size), None)
+
+    def invalidate_chunks(self) -> None:
+        self._chunks.clear()
+
+    def _get_chunk(self,
+                   chunk_x: int,
+                   chunk_y: int) -> pygame.Surface | None:
+        """Return the pre-rendered chunk, or None if it only holds empty tiles."""
+
+        if (chunk_x, chunk_y) in self._chunks:
+            self._chunks.move_to_end((chunk_x, chunk_y))
+            return self._chunks[(chunk_x, chunk_y)]
+
+        chunk = self._build_chunk(chunk_x, chunk_y)
+        self._chunks[(chunk_x, chunk_y)] = chunk
+
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+
+        return chunk
+
+    def _build_chunk(self,
+                     chunk_x: int,
+                     chunk_y: int) -> pygame.Surface | None:
+
+        start_x = chunk_x * self.chunk_size
+        end_x = min(start_x + self.chunk_size, self.tilemap_size[0])
+        start_y = chunk_y * self.chunk_size
+        end_y = min(start_y + self.chunk_size, self.tilemap_size[1])
+
+        tiles = self._get_tile_blits(start_x, end_x, start_y, end_y, (start_x*self.tile_size, start_y*self.tile_size))
+
+        if not tiles:
+            return None
+
+        # Tiles larger than the grid step (negative inter tile distance) overhang the last row and column.
+        overhang = max(0, self.tileset[0].get_size()[0] - self.tile_size)
+        chunk = pygame.Surface((self.chunk_size*self.tile_size + overhang,
+                                self.chunk_size*self.tile_size + overhang), pygame.SRCALPHA)
+        chunk.fblits(tiles)
+
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert_alpha()
 
+        return chunk
+
+    @FrameProfiler.measure("render")
     def render(self,
                camera: Camera = None) -> None:
 
@@ -47,20 +137,54 @@ class TilemapScene(Scene):
             camera = self.camera
 
         camera_pos = pygame.Vector2(math.floor(camera.position.position[0]), math.floor(camera.position.position[1]))
+
+        if self.chunk_size is not None:
+            self._render_chunks(camera_pos)
+            return
+
         start_x = max(0, math.floor(camera_pos[0]/self.tile_size))
         end_x = min(math.ceil((camera_pos[0]+self.rect.width)/self.tile_size), self.tilemap_size[0])
         start_y = max(0, math.floor(camera_pos[1]/self.tile_size))
         end_y = min(math.ceil((camera_pos[1]+self.rect.height)/self.tile_size), self.tilemap_size[1])
 
-        pos_x = numpy.arange(end_x)*self.tile_size - camera_pos[0]
-        pos_y = numpy.arange(end_y)*self.tile_size - camera_pos[1]
+        self.surface.fblits(self._get_tile_blits(start_x, end_x, start_y, end_y, camera_pos))
+
+    def _get_tile_blits(self,
+                        start_x: int,
+                        end_x: int,
+                        start_y: int,
+                        end_y: int,
+                        origin: tuple[float, float]) -> list[tuple[pygame.Surface, tuple[float, float]]]:
+        """Return the blits of the non-empty tiles in a region, column by column, relative to origin (in pixels)."""
+
+        region = self.tilemap[start_y:end_y, start_x:end_x].T
+        xs, ys = numpy.nonzero(region != self.EMPTY_TILE)
+
+        pos_x = (xs + start_x) * self.tile_size - origin[0]
+        pos_y = (ys + start_y) * self.tile_size - origin[1]
 
-        self.surface.fblits([(self.tileset[self.tilemap[y][x]], (pos_x[x], pos_y[y]))
-                             for x in range(start_x, end_x)
-                             for y in range(start_y, end_y)
-                             if self.tilemap[y][x] != -1])
+        return [(self.tileset[tile], pos)
+                for tile, pos in zip(region[xs, ys].tolist(), zip(pos_x.tolist(), pos_y.tolist()))]
 
-        return
+    def _render_chunks(self,
+                       camera_pos: pygame.Vector2) -> None:
+
+        chunk_pixels = self.chunk_size * self.tile_size
+        chunk_count = math.ceil(self.tilemap_size[0]/self.chunk_size), math.ceil(self.tilemap_size[1]/self.chunk_size)
+
+        start_x = max(0, math.floor(camera_pos[0]/chunk_pixels))
+        end_x = min(math.ceil((camera_pos[0]+self.rect.width)/chunk_pixels), chunk_count[0])
+        start_y = max(0, math.floor(camera_pos[1]/chunk_pixels))
+        end_y = min(math.ceil((camera_pos[1]+self.rect.height)/chunk_pixels), chunk_count[1])
+
+        chunks = []
+        for chunk_x in range(start_x, end_x):
+            for chunk_y in range(start_y, end_y):
+                chunk = self._get_chunk(chunk_x, chunk_y)
+                if chunk is not None:
+                    chunks.append((chunk, (chunk_x*chunk_pixels - camera_pos[0], chunk_y*chunk_pixels - camera_pos[1])))
+
+        self.surface.fblits(chunks)
 
     @classmethod
     def create_tileset(cls,
@@ -96,42 +220,40 @@ class TilemapScene(Scene):
 
     @classmethod
     def create_collision_map(cls,
-                             tilemap: list[list[int]],
+                             tilemap: list[list[int]] | numpy.ndarray,
                              collision_tile: list[int]) -> list[list[bool]]:
         """Function that return a collision map where every tile adjacent to void tiles is True and False otherwise."""
 
-        collision_map = []
+        return cls.create_collision_mask(tilemap, collision_tile).tolist()
 
-        for y, row in enumerate(tilemap):
-            collision_map.append([False] * len(row))
+    @classmethod
+    def create_collision_mask(cls,
+                              tilemap: list[list[int]] | numpy.ndarray,
+                              collision_tile: list[int]) -> numpy.ndarray:
+        """Same as create_collision_map, as a 2D boolean array."""
 
-            if y == 0 or y == len(tilemap) - 1:
-                collision_map[y] = [True] * len(row)
-                continue
+        tilemap = numpy.asarray(tilemap)
 
-            for x, tile in enumerate(row):
-                if x == 0 or x == len(row) - 1:
-                    collision_map[y][x] = True
-                    continue
+        # Lookup table of the solid tiles, indexed by tile id - lowest id.
+        lowest_id = min(int(tilemap.min()), cls.EMPTY_TILE)
+        highest_id = int(tilemap.max())
+        solid_lut = numpy.zeros(highest_id - lowest_id + 1, dtype=bool)
+        solid_lut[[tile - lowest_id for tile in collision_tile if lowest_id <= tile <= highest_id]] = True
 
-                if tile == cls.EMPTY_TILE or tile not in collision_tile:
-                    collision_map[y][x] = False
-                    continue
+        solid = solid_lut[tilemap - lowest_id]
+        void = ~solid
 
-                if any((tilemap[y-1][x] not in collision_tile,
-                        tilemap[y+1][x] not in collision_tile,
-                        tilemap[y][x-1] not in collision_tile,
-                        tilemap[y][x+1] not in collision_tile,
-                        tilemap[y-1][x-1] not in collision_tile,
-                        tilemap[y-1][x+1] not in collision_tile,
-                        tilemap[y+1][x-1] not in collision_tile,
-                        tilemap[y+1][x+1] not in collision_tile)):
+        # A tile is exposed if one of its 8 neighbours is void.
+        exposed = numpy.zeros_like(solid)
+        exposed[1:-1, 1:-1] = (void[:-2, :-2] | void[:-2, 1:-1] | void[:-2, 2:] |
+                               void[1:-1, :-2] | void[1:-1, 2:] |
+                               void[2:, :-2] | void[2:, 1:-1] | void[2:, 2:])
 
-                    collision_map[y][x] = True
-                else:
-                    collision_map[y][x] = False
+        collision_mask = solid & exposed & (tilemap != cls.EMPTY_TILE)
+        collision_mask[[0, -1], :] = True
+        collision_mask[:, [0, -1]] = True
 
-        return collision_map
+        return collision_mask
 
 
 if __name__ == '__main__':
@@ -150,3 +272,42 @@ if __name__ == '__main__':
     draw_circle(tile_map, 50, 50, 16, 0)
     tile_set = {0: pygame.Surface((32, 32), pygame.SRCALPHA)}
     pygame.draw.circle(tile_set[0], (255, 255, 255), (16, 16), 16)
+
+    def legacy_collision_map(_tilemap: list[list[int]],
+                             _collision_tile: list[int]) -> list[list[bool]]:
+
+        _collision_map = []
+        for _y, _row in enumerate(_tilemap):
+            if _y == 0 or _y == len(_tilemap) - 1:
+                _collision_map.append([True] * len(_row))
+                continue
+
+            _collision_map.append([_x == 0 or _x == len(_row) - 1 or
+                                   (_tile != TilemapScene.EMPTY_TILE and _tile in _collision_tile and
+                                    any(_tilemap[_y+j][_x+i] not in _collision_tile
+                                        for i in (-1, 0, 1) for j in (-1, 0, 1) if i or j))
+                                   for _x, _tile in enumerate(_row)])
+
+        return _collision_map
+
+    import timeit
+
+    # Map-switch benchmark: a 200x200 cave map where a third of the tile ids are solid.
+    numpy.random.seed(0)
+    cave_map = numpy.random.randint(-1, 300, (200, 200))
+    cave_map[numpy.random.random((200, 200)) < 0.6] = 0
+    cave_map_list = cave_map.tolist()
+    cave_collision_tile = list(range(0, 300, 3))
+
+    assert TilemapScene.create_collision_map(cave_map_list, cave_collision_tile) == \
+        legacy_collision_map(cave_map_list, cave_collision_tile)
+    assert TilemapScene.create_collision_map(tile_map, [0]) == legacy_collision_map(tile_map, [0])
+
+    legacy_time = timeit.timeit(lambda: legacy_collision_map(cave_map_list, cave_collision_tile), number=5) / 5
+    mask_time = timeit.timeit(lambda: TilemapScene.create_collision_mask(cave_map, cave_collision_tile),
+                              number=5) / 5
+    map_time = timeit.timeit(lambda: TilemapScene.create_collision_map(cave_map, cave_collision_tile), number=5) / 5
+
+    print(f"Legacy collision map: {legacy_time*1000:.2f} ms")
+    print(f"Collision mask:       {mask_time*1000:.2f} ms")
+    print(f"Collision map (list): {map_time*1000:.2f} ms")
@@ -25,12 +25,25 @@ class AnimatedSprite(Sprite):
                          blit_flag=blit_flag)
 
         self.surfaces: list[pygame.Surface] = surfaces
+        self.max_rect = max((self.get_max_rect(surface) for surface in surfaces), key=lambda rect: rect.width)
         self.frame_durations: list[float] = frame_durations
         self.loop: bool = loop
 
         self._current_frame: int = 0
         self._current_duration: float = 0.0
 
+    def restart(self,
+                frame_durations: list[float] = None) -> None:
+        """Go back to the first frame, with new frame durations if given."""
+
+        if frame_durations is not None:
+            if len(frame_durations) != len(self.surfaces):
+                raise ValueError("Length of surfaces and frame_durations must be equal.")
+            self.frame_durations = frame_durations
+
+        self._current_frame = 0
+        self._current_duration = 0.0
+
     def update(self,
                delta: float) -> None:
 
@@ -36,6 +36,12 @@ class PymunkSprite(Sprite):
                                     (255, 255, 255),
                                     vertices)
 
+            elif isinstance(shape, pymunk.Segment):
+                pygame.draw.line(surface,
+                                 (255, 255, 255),
+                                 shape.a+(surface.get_size()[0]/2, surface.get_size()[1]/2),
+                                 shape.b+(surface.get_size()[0]/2, surface.get_size()[1]/2))
+
             else:
                 raise TypeError(f"Unknown shape type: {type(shape)}. Maybe not supported yet...")
 
@@ -1,4 +1,5 @@
 from isec.environment.tile_utils.tile_collision import TileCollision
+from isec.environment.tile_utils.tile_raycaster import TileRaycaster
 
 
-__all__ = ["TileCollision"]
+__all__ = ["TileCollision", "TileRaycaster"]
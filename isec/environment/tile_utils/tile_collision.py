@@ -1,5 +1,8 @@
+import typing
+import math
 import pygame
 import pymunk
+import numpy
 
 from isec.environment.base import Entity, Sprite
 from isec.environment.position import PymunkPos
@@ -7,42 +10,284 @@ from isec.environment.sprite import PymunkSprite
 
 
 class TileCollision(Entity):
+    """
+    Static pymunk shapes covering every collision tile of a map.
+
+    Merge modes:
+        - tiles:      one square per collision tile.
+        - rectangles: collision tiles greedily merged into maximal rectangles, same covered area.
+        - segments:   one segment per straight run of the collision tiles contours, same boundary.
+
+    With chunk_size, the map is split in chunks of chunk_size x chunk_size tiles whose shapes are only built
+    and added to the space when a dynamic body comes within activation_margin pixels of them,
+    and removed from the space when no dynamic body is close anymore.
+
+    tile_count and shape_count report how many shapes were saved by merging.
+    """
+
+    cullable = False
+
+    MERGE_MODES = typing.Literal["tiles", "rectangles", "segments"]
+
     def __init__(self,
-                 collision_map: list[list[bool]],
+                 collision_map: list[list[bool]] | numpy.ndarray,
                  tile_size: int,
                  wall_friction: float = None,
                  wall_elasticity: float = None,
                  show_collision: bool = False,
-                 collision_type: int = None) -> None:
+                 collision_type: int = None,
+                 merge_mode: MERGE_MODES = "tiles",
+                 chunk_size: int = None,
+                 activation_margin: float = 64) -> None:
+
+        if merge_mode not in typing.get_args(self.MERGE_MODES):
+            raise ValueError(f"Invalid merge mode {merge_mode}")
+
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError("Chunk size must be greater than 0.")
 
         self.collision_map = collision_map
         self.tile_size = tile_size
+        self.merge_mode = merge_mode
+        self.chunk_size = chunk_size
+        self.activation_margin = activation_margin
+
+        self._mask = numpy.asarray(collision_map, dtype=bool)
+        self._edges = self._get_edges(self._mask) if merge_mode == "segments" else None
+        self._chunk_shapes: dict[tuple[int, int], list[pymunk.Shape]] = {}
+        self.active_chunks: set[tuple[int, int]] = set()
 
         position = PymunkPos(body_type=PymunkPos.TYPE_STATIC,
                              base_shape_friction=wall_friction,
                              base_shape_elasticity=wall_elasticity,
                              shape_collision_type=collision_type)
 
-        self._build_collision_shape(position)
+        self.tile_count = int(numpy.count_nonzero(self._mask))
 
-        sprite = PymunkSprite(position) if show_collision else Sprite(pygame.Surface((1, 1),
-                                                                                     pygame.SRCALPHA))
+        if chunk_size is None:
+            position.shapes.extend(self._build_shapes(position, 0, 0, *self._mask.shape[::-1]))
+
+        sprite = Sprite(pygame.Surface((1, 1), pygame.SRCALPHA))
+        if show_collision:
+            sprite = self._create_collision_sprite(position)
 
         super().__init__(position=position, sprite=sprite)
 
-    def _build_collision_shape(self,
-                               position: PymunkPos) -> None:
-
-        for y, row in enumerate(self.collision_map):
-            for x, collision_tile in enumerate(row):
-                if collision_tile:
-                    vertices = [(x*self.tile_size, y*self.tile_size),
-                                (x*self.tile_size+self.tile_size, y*self.tile_size),
-                                (x*self.tile_size+self.tile_size, y*self.tile_size+self.tile_size),
-                                (x*self.tile_size, y*self.tile_size+self.tile_size)]
-
-                    tile_shape = pymunk.Poly(position.body,
-                                             vertices,
-                                             radius=0)
-                    position.set_shape_characteristics(tile_shape)
-                    position.shapes.append(tile_shape)
+    @property
+    def shape_count(self) -> int:
+        """Number of shapes built so far. With chunks, only the chunks that have been activated are built."""
+
+        if self.chunk_size is None:
+            return len(self.position.shapes)
+
+        return sum(len(shapes) for shapes in self._chunk_shapes.values())
+
+    @property
+    def chunk_count(self) -> tuple[int, int]:
+        return math.ceil(self._mask.shape[1] / self.chunk_size), math.ceil(self._mask.shape[0] / self.chunk_size)
+
+    def update(self,
+               delta: float) -> None:
+
+        super().update(delta)
+
+        if self.chunk_size is not None:
+            self._stream_chunks()
+
+    def _create_collision_sprite(self,
+                                 position: PymunkPos) -> PymunkSprite:
+        """With chunks, every chunk is built for the debug sprite, but still only added to the space when needed."""
+
+        if self.chunk_size is None:
+            return PymunkSprite(position)
+
+        for chunk_x in range(self.chunk_count[0]):
+            for chunk_y in range(self.chunk_count[1]):
+                self._get_chunk_shapes(position, chunk_x, chunk_y)
+
+        position.shapes = [shape for shapes in self._chunk_shapes.values() for shape in shapes]
+        sprite = PymunkSprite(position)
+        position.shapes = []
+
+        return sprite
+
+    def _stream_chunks(self) -> None:
+        """Add the chunks near dynamic bodies to the space, and remove the others."""
+
+        space = self.position.body.space
+        if space is None:
+            return
+
+        chunk_pixels = self.chunk_size * self.tile_size
+        chunk_count = self.chunk_count
+        needed_chunks = set()
+
+        for body in space.bodies:
+            if body.body_type != pymunk.Body.DYNAMIC:
+                continue
+
+            for shape in body.shapes:
+                bb = shape.cache_bb()
+                start_x = max(0, int((bb.left - self.activation_margin) // chunk_pixels))
+                end_x = min(chunk_count[0] - 1, int((bb.right + self.activation_margin) // chunk_pixels))
+                start_y = max(0, int((bb.bottom - self.activation_margin) // chunk_pixels))
+                end_y = min(chunk_count[1] - 1, int((bb.top + self.activation_margin) // chunk_pixels))
+
+                needed_chunks.update((chunk_x, chunk_y)
+                                     for chunk_x in range(start_x, end_x+1)
+                                     for chunk_y in range(start_y, end_y+1))
+
+        for chunk in self.active_chunks - needed_chunks:
+            if self._chunk_shapes[chunk]:
+                space.remove(*self._chunk_shapes[chunk])
+
+        for chunk in needed_chunks - self.active_chunks:
+            shapes = self._get_chunk_shapes(self.position, *chunk)
+            if shapes:
+                space.add(*shapes)
+
+        self.active_chunks = needed_chunks
+
+    def _get_chunk_shapes(self,
+                          position: PymunkPos,
+                          chunk_x: int,
+                          chunk_y: int) -> list[pymunk.Shape]:
+
+        if (chunk_x, chunk_y) not in self._chunk_shapes:
+            start_x, start_y = chunk_x * self.chunk_size, chunk_y * self.chunk_size
+            end_x = min(start_x + self.chunk_size, self._mask.shape[1])
+            end_y = min(start_y + self.chunk_size, self._mask.shape[0])
+
+            self._chunk_shapes[(chunk_x, chunk_y)] = self._build_shapes(position, start_x, start_y, end_x, end_y)
+
+        return self._chunk_shapes[(chunk_x, chunk_y)]
+
+    def _build_shapes(self,
+                      position: PymunkPos,
+                      start_x: int,
+                      start_y: int,
+                      end_x: int,
+                      end_y: int) -> list[pymunk.Shape]:
+        """Build the shapes of the tiles from (start_x, start_y) included to (end_x, end_y) excluded."""
+
+        shapes = []
+
+        if self.merge_mode == "segments":
+            # Contour lines on the far side of the map belong to the last chunks, the others to the chunk after them.
+            horizontal_edges, vertical_edges = self._edges
+            last_y = end_y + 1 if end_y == self._mask.shape[0] else end_y
+            last_x = end_x + 1 if end_x == self._mask.shape[1] else end_x
+
+            segments = [((start + start_x, line + start_y), (end + start_x, line + start_y))
+                        for line, start, end in self._get_runs(horizontal_edges[start_y:last_y, start_x:end_x])]
+            segments.extend(((line + start_x, start + start_y), (line + start_x, end + start_y))
+                            for line, start, end in self._get_runs(vertical_edges[start_y:end_y, start_x:last_x].T))
+
+            for (x1, y1), (x2, y2) in segments:
+                tile_shape = pymunk.Segment(position.body,
+                                            (x1*self.tile_size, y1*self.tile_size),
+                                            (x2*self.tile_size, y2*self.tile_size),
+                                            radius=0)
+                position.set_shape_characteristics(tile_shape)
+                shapes.append(tile_shape)
+
+            return shapes
+
+        mask = self._mask[start_y:end_y, start_x:end_x]
+
+        if self.merge_mode == "rectangles":
+            rects = self.get_merged_rects(mask)
+        else:
+            rects = [(x, y, 1, 1) for y, x in zip(*numpy.nonzero(mask))]
+
+        for x, y, width, height in rects:
+            x, y = x + start_x, y + start_y
+            vertices = [(x*self.tile_size, y*self.tile_size),
+                        ((x+width)*self.tile_size, y*self.tile_size),
+                        ((x+width)*self.tile_size, (y+height)*self.tile_size),
+                        (x*self.tile_size, (y+height)*self.tile_size)]
+
+            tile_shape = pymunk.Poly(position.body,
+                                     vertices,
+                                     radius=0)
+            position.set_shape_characteristics(tile_shape)
+            shapes.append(tile_shape)
+
+        return shapes
+
+    @staticmethod
+    def get_merged_rects(collision_map: list[list[bool]] | numpy.ndarray) -> list[tuple[int, int, int, int]]:
+        """
+        Cover the collision tiles with (x, y, width, height) rectangles, in tiles.
+
+        Greedy meshing: from the first uncovered tile in reading order, grow a rectangle as wide as possible,
+        then as tall as possible while whole rows of the same width are uncovered.
+        """
+
+        uncovered = numpy.array(collision_map, dtype=bool)
+        height, width = uncovered.shape
+        rects = []
+
+        for y, x in zip(*numpy.nonzero(uncovered)):
+            if not uncovered[y, x]:
+                continue
+
+            row = uncovered[y, x:]
+            rect_width = len(row) if row.all() else int(numpy.argmin(row))
+
+            rect_height = 1
+            while y + rect_height < height and uncovered[y+rect_height, x:x+rect_width].all():
+                rect_height += 1
+
+            uncovered[y:y+rect_height, x:x+rect_width] = False
+            rects.append((int(x), int(y), rect_width, rect_height))
+
+        return rects
+
+    @staticmethod
+    def get_contour_segments(collision_map: list[list[bool]] | numpy.ndarray
+                             ) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+        """Return the boundary between collision and empty tiles as ((x1, y1), (x2, y2)) straight segments, in tiles."""
+
+        horizontal_edges, vertical_edges = TileCollision._get_edges(numpy.array(collision_map, dtype=bool))
+
+        segments = [((start, line), (end, line))
+                    for line, start, end in TileCollision._get_runs(horizontal_edges)]
+        segments.extend(((line, start), (line, end))
+                        for line, start, end in TileCollision._get_runs(vertical_edges.T))
+
+        return segments
+
+    @staticmethod
+    def _get_edges(mask: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Return the horizontal and vertical contour edges of mask.
+
+        horizontal_edges[y, x] is the edge above tile (x, y), vertical_edges[y, x] the edge on its left.
+        They have an extra row and column respectively for the far side of the map.
+        """
+
+        solid = numpy.pad(mask, 1)
+
+        horizontal_edges = solid[:-1, 1:-1] != solid[1:, 1:-1]
+        vertical_edges = solid[1:-1, :-1] != solid[1:-1, 1:]
+
+        return horizontal_edges, vertical_edges
+
+    @staticmethod
+    def _get_runs(edges: numpy.ndarray) -> list[tuple[int, int, int]]:
+        """Return (row, start, end) for every run of consecutive True values of each row, end excluded."""
+
+        changes = numpy.diff(numpy.pad(edges, ((0, 0), (1, 1))).astype(numpy.int8), axis=1)
+        rows, starts = numpy.nonzero(changes == 1)
+        _, ends = numpy.nonzero(changes == -1)
+
+        return list(zip(rows.tolist(), starts.tolist(), ends.tolist()))
+
+    def report(self) -> str:
+        report = f"{self.tile_count} collision tiles, {self.shape_count} shapes ({self.merge_mode})"
+
+        if self.chunk_size is not None:
+            report += f", {len(self.active_chunks)}/{self.chunk_count[0]*self.chunk_count[1]} chunks active"
+
+        return report
@@ -1,5 +1,7 @@
 from isec.instance.handlers import LoopHandler
 from isec.instance.handlers import EventHandler
+from isec.instance.handlers import FrameProfiler
+from isec.instance.handlers import InputRecorder, InputReplay
 from isec.instance.base_instance import BaseInstance
 
-__all__ = [LoopHandler, EventHandler, BaseInstance]
+__all__ = [LoopHandler, EventHandler, FrameProfiler, InputRecorder, InputReplay, BaseInstance]
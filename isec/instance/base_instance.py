@@ -3,7 +3,7 @@ import asyncio
 
 import isec.app
 from isec.app.resource import Resource
-from isec.instance.handlers import LoopHandler, EventHandler
+from isec.instance.handlers import LoopHandler, EventHandler, FrameProfiler
 
 
 class BaseInstance:
@@ -20,9 +20,18 @@ class BaseInstance:
         self.fps = fps
 
     async def _preloop(self):
-        pygame.display.flip()
-        LoopHandler.limit_and_get_delta(self.fps)
-        await self.event_handler.handle_events()
+        if isec.app.App.headless:
+            LoopHandler.get_fixed_delta(self.fps)
+        else:
+            FrameProfiler.render_overlay(self.window)
+            with FrameProfiler.measure("flip"):
+                pygame.display.flip()
+            with FrameProfiler.measure("wait"):
+                LoopHandler.limit_and_get_delta(self.fps)
+
+        FrameProfiler.end_frame()
+        with FrameProfiler.measure("events"):
+            await self.event_handler.handle_events()
 
     async def setup(self):
         return
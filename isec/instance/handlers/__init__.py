@@ -1,4 +1,6 @@
 from isec.instance.handlers.loop_handler import LoopHandler
 from isec.instance.handlers.event_handler import EventHandler
+from isec.instance.handlers.frame_profiler import FrameProfiler
+from isec.instance.handlers.input_source import LiveInput, InputRecorder, InputReplay
 
-__all__ = [EventHandler, LoopHandler]
+__all__ = [EventHandler, LoopHandler, FrameProfiler, LiveInput, InputRecorder, InputReplay]
@@ -0,0 +1,134 @@
+import collections
+import contextlib
+import pygame
+import numpy
+import time
+import json
+import csv
+
+from isec._ise_typing import PathLike
+
+
+class FrameProfiler:
+    """
+    Per phase timings of the last frames.
+
+    Each phase is measured with the measure context manager. Time spent in a phase nested in another
+    only counts for the nested one, so the entity updates and the physics step of a scene update are apart.
+    wait is the time the clock sleeps to limit the fps, frame the whole frame, wait included.
+    """
+
+    PHASES = ("events", "update", "physics", "render", "flip", "wait")
+
+    enabled: bool = False
+    overlay: bool = False
+    history: int = 600
+
+    _frames: collections.deque = collections.deque(maxlen=history)
+    _current: dict[str, float] = {}
+    _stack: list[list] = []
+    _frame_start: float | None = None
+    _font: pygame.font.Font | None = None
+
+    @classmethod
+    def enable(cls,
+               overlay: bool = False,
+               history: int = 600) -> None:
+
+        cls.enabled = True
+        cls.overlay = overlay
+        cls.history = history
+        cls._frames = collections.deque(maxlen=history)
+
+    @classmethod
+    @contextlib.contextmanager
+    def measure(cls,
+                phase: str):
+
+        if not cls.enabled:
+            yield
+            return
+
+        # [phase, start, time spent in nested phases]
+        entry = [phase, time.perf_counter(), 0]
+        cls._stack.append(entry)
+        try:
+            yield
+        finally:
+            cls._stack.pop()
+            elapsed = time.perf_counter() - entry[1]
+            cls._current[phase] = cls._current.get(phase, 0) + elapsed - entry[2]
+            if cls._stack:
+                cls._stack[-1][2] += elapsed
+
+    @classmethod
+    def end_frame(cls) -> None:
+        """Close the current frame, which starts the next one."""
+
+        if not cls.enabled:
+            return
+
+        now = time.perf_counter()
+        if cls._frame_start is not None:
+            frame = {phase: cls._current.get(phase, 0) for phase in cls.PHASES}
+            frame["frame"] = now - cls._frame_start
+            cls._frames.append(frame)
+
+        cls._current = {}
+        cls._frame_start = now
+
+    @classmethod
+    def get_percentiles(cls,
+                        percentiles: tuple[float, ...] = (50, 95, 99)) -> dict[str, dict[float, float]]:
+        """Return the percentiles of each phase over the last frames, in milliseconds."""
+
+        if not cls._frames:
+            return {}
+
+        return {phase: dict(zip(percentiles, numpy.percentile([frame[phase] for frame in cls._frames],
+                                                              percentiles) * 1000))
+                for phase in (*cls.PHASES, "frame")}
+
+    @classmethod
+    def report(cls) -> str:
+        lines = [f"{'phase':<8} {'p50':>7} {'p95':>7} {'p99':>7}  (ms, last {len(cls._frames)} frames)"]
+        for phase, values in cls.get_percentiles().items():
+            lines.append(f"{phase:<8} {values[50]:>7.2f} {values[95]:>7.2f} {values[99]:>7.2f}")
+
+        return "\n".join(lines)
+
+    @classmethod
+    def render_overlay(cls,
+                       surface: pygame.Surface) -> None:
+
+        if not (cls.enabled and cls.overlay and cls._frames):
+            return
+
+        if cls._font is None:
+            cls._font = pygame.font.Font(None, 14)
+
+        for i, line in enumerate(cls.report().splitlines()):
+            text = cls._font.render(line, False, (255, 255, 255), (0, 0, 0))
+            surface.blit(text, (2, 2 + i * text.get_height()))
+
+    @classmethod
+    def export_csv(cls,
+                   path: PathLike) -> None:
+        """Write the timings of every kept frame, in milliseconds."""
+
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=(*cls.PHASES, "frame"))
+            writer.writeheader()
+            writer.writerows({phase: value * 1000 for phase, value in frame.items()} for frame in cls._frames)
+
+    @classmethod
+    def export_json(cls,
+                    path: PathLike) -> None:
+        """Write the percentiles and the timings of every kept frame, in milliseconds."""
+
+        with open(path, "w") as file:
+            json.dump({"percentiles": {phase: {f"p{key}": value for key, value in values.items()}
+                                       for phase, values in cls.get_percentiles().items()},
+                       "frames": [{phase: value * 1000 for phase, value in frame.items()} for frame in cls._frames]},
+                      file,
+                      indent=2)
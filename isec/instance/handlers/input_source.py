@@ -0,0 +1,189 @@
+import typing
+import pygame
+import struct
+import json
+import zlib
+
+from isec._ise_typing import PathLike
+
+
+InputFrame = tuple[list[pygame.event.Event],        # events
+                   tuple[int, int],                 # mouse_rel
+                   tuple[int, int],                 # mouse_pos
+                   typing.Sequence[bool],           # key_pressed, indexed by key
+                   tuple[bool, ...]]                # button_pressed, 5 buttons
+
+
+class LiveInput:
+    """Where EventHandler reads its input from: pygame, one frame at a time."""
+
+    def get_frame(self) -> InputFrame:
+        return (pygame.event.get(),
+                pygame.mouse.get_rel(),
+                pygame.mouse.get_pos(),
+                pygame.key.get_pressed(),
+                pygame.mouse.get_pressed(5))
+
+    def close(self) -> None:
+        return
+
+
+class InputRecorder(LiveInput):
+    """
+    Live input, written frame by frame to a zlib compressed log that InputReplay plays back.
+
+    Each frame stores the mouse position and movement, the pressed buttons as a bitmask, the scancodes of
+    the pressed keys and the events. Events keep their attributes that are numbers, strings or tuples of them.
+    metadata is stored in the header as json, for the replay to start the same way (random seed, level...).
+    """
+
+    MAGIC = b"ISEC-INPUT-1"
+    FRAME_FORMAT = struct.Struct("<hhhhBBH")   # mouse_pos, mouse_rel, buttons, key count, event count
+    EVENT_FORMAT = struct.Struct("<IH")        # type, attributes size
+
+    def __init__(self,
+                 path: PathLike,
+                 metadata: dict[str, ...] = None) -> None:
+
+        encoded_metadata = json.dumps({} if metadata is None else metadata).encode()
+
+        self.file = open(path, "wb")
+        self.file.write(self.MAGIC + struct.pack("<I", len(encoded_metadata)) + encoded_metadata)
+        self.compressor = zlib.compressobj()
+        self.frame_count = 0
+
+    def get_frame(self) -> InputFrame:
+        frame = super().get_frame()
+        self.file.write(self.compressor.compress(self.encode_frame(*frame)))
+        self.frame_count += 1
+
+        return frame
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+
+        self.file.write(self.compressor.flush())
+        self.file.close()
+
+    @classmethod
+    def encode_frame(cls,
+                     events: list[pygame.event.Event],
+                     mouse_rel: tuple[int, int],
+                     mouse_pos: tuple[int, int],
+                     key_pressed: typing.Sequence[bool],
+                     button_pressed: tuple[bool, ...]) -> bytes:
+
+        # get_pressed forbids iterating over it, its underlying tuple is indexed by scancode.
+        pressed_scancodes = [scancode for scancode, pressed in enumerate(tuple.__iter__(key_pressed)) if pressed]
+        buttons = sum(1 << button for button, pressed in enumerate(button_pressed) if pressed)
+
+        encoded_events = []
+        for event in events:
+            attributes = json.dumps({key: value for key, value in event.dict.items()
+                                     if cls._is_recordable(value)}, separators=(",", ":")).encode()
+            encoded_events.append(cls.EVENT_FORMAT.pack(event.type, len(attributes)) + attributes)
+
+        return (cls.FRAME_FORMAT.pack(*mouse_pos, *mouse_rel, buttons, len(pressed_scancodes), len(events))
+                + struct.pack(f"<{len(pressed_scancodes)}H", *pressed_scancodes)
+                + b"".join(encoded_events))
+
+    @staticmethod
+    def _is_recordable(value) -> bool:
+        if isinstance(value, (tuple, list)):
+            return all(isinstance(item, (int, float)) for item in value)
+
+        return isinstance(value, (int, float, str)) or value is None
+
+
+class InputReplay:
+    """
+    Input read back from an InputRecorder log, one recorded frame per frame.
+
+    on_end is called once the log is exhausted, after which frames are empty.
+    """
+
+    def __init__(self,
+                 path: PathLike,
+                 on_end: typing.Callable[[], None] = None) -> None:
+
+        with open(path, "rb") as file:
+            data = file.read()
+
+        if not data.startswith(InputRecorder.MAGIC):
+            raise ValueError(f"{path} is not an input log.")
+
+        metadata_start = len(InputRecorder.MAGIC) + 4
+        metadata_end = metadata_start + struct.unpack("<I", data[len(InputRecorder.MAGIC):metadata_start])[0]
+        self.metadata: dict[str, ...] = json.loads(data[metadata_start:metadata_end])
+        self.frames = self.decode_frames(zlib.decompress(data[metadata_end:]))
+
+        self.on_end = on_end
+        self.frame_index = 0
+        self._last_mouse_pos = (0, 0)
+        self._key_pressed_type = type(pygame.key.get_pressed())
+        self._key_count = len(pygame.key.get_pressed())
+
+    @property
+    def finished(self) -> bool:
+        return self.frame_index >= len(self.frames)
+
+    def get_frame(self) -> InputFrame:
+        if self.finished:
+            if self.frame_index == len(self.frames):
+                self.frame_index += 1
+                if self.on_end is not None:
+                    self.on_end()
+
+            return [], (0, 0), self._last_mouse_pos, self._create_key_pressed(()), (False,) * 5
+
+        events, mouse_rel, mouse_pos, pressed_scancodes, buttons = self.frames[self.frame_index]
+        self.frame_index += 1
+        self._last_mouse_pos = mouse_pos
+
+        return (events,
+                mouse_rel,
+                mouse_pos,
+                self._create_key_pressed(pressed_scancodes),
+                tuple(bool(buttons & (1 << button)) for button in range(5)))
+
+    def _create_key_pressed(self,
+                            pressed_scancodes: typing.Iterable[int]) -> typing.Sequence[bool]:
+        """Return a pygame.key.get_pressed like sequence, indexed by key rather than by scancode."""
+
+        pressed = [False] * self._key_count
+        for scancode in pressed_scancodes:
+            pressed[scancode] = True
+
+        return self._key_pressed_type(pressed)
+
+    def close(self) -> None:
+        return
+
+    @staticmethod
+    def decode_frames(data: bytes) -> list[tuple[list[pygame.event.Event], tuple, tuple, tuple[int, ...], int]]:
+        frames = []
+        offset = 0
+
+        while offset < len(data):
+            mouse_x, mouse_y, rel_x, rel_y, buttons, key_count, event_count = \
+                InputRecorder.FRAME_FORMAT.unpack_from(data, offset)
+            offset += InputRecorder.FRAME_FORMAT.size
+
+            pressed_scancodes = struct.unpack_from(f"<{key_count}H", data, offset)
+            offset += 2 * key_count
+
+            events = []
+            for _ in range(event_count):
+                event_type, size = InputRecorder.EVENT_FORMAT.unpack_from(data, offset)
+                offset += InputRecorder.EVENT_FORMAT.size
+
+                attributes = json.loads(data[offset:offset+size])
+                offset += size
+
+                events.append(pygame.event.Event(event_type, {key: tuple(value) if isinstance(value, list) else value
+                                                              for key, value in attributes.items()}))
+
+            frames.append((events, (rel_x, rel_y), (mouse_x, mouse_y), pressed_scancodes, buttons))
+
+        return frames
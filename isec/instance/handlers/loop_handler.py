@@ -1,4 +1,5 @@
 import pygame
+import time
 import sys
 
 from isec._ise_error import InvalidInstanceError
@@ -8,7 +9,16 @@ class LoopHandler:
     stack: list = []
     delta: float = 0
 
+    # Simulated time is the sum of the deltas, wall time is measured from the first frame.
+    simulated_time: float = 0
+    frame_count: int = 0
+    simulation_limit: float | None = None
+
+    # When set, the delta is always 1/fps, even if the clock is late, so that runs are reproducible.
+    fixed_delta: bool = False
+
     _clock: pygame.time.Clock = pygame.time.Clock()
+    _wall_start: float | None = None
 
     @classmethod
     def is_running(cls,
@@ -26,8 +36,46 @@ class LoopHandler:
                             fps: int):
 
         cls.delta = cls._clock.tick(fps) / 1000
+        if cls.fixed_delta:
+            cls.delta = 1 / fps
+        cls._count_frame()
         return cls.delta
 
+    @classmethod
+    def get_fixed_delta(cls,
+                        fps: int):
+        """Advance by exactly 1/fps without waiting, for headless runs."""
+
+        cls.delta = 1 / fps
+        cls._count_frame()
+        return cls.delta
+
+    @classmethod
+    def _count_frame(cls) -> None:
+        if cls._wall_start is None:
+            cls._wall_start = time.perf_counter()
+
+        cls.simulated_time += cls.delta
+        cls.frame_count += 1
+
+        if cls.simulation_limit is not None and cls.simulated_time >= cls.simulation_limit:
+            cls.stop_game()
+
+    @classmethod
+    def get_simulation_speed(cls) -> float:
+        """Return the simulated seconds per wall second since the first frame."""
+
+        if cls._wall_start is None:
+            return 0
+
+        wall_time = time.perf_counter() - cls._wall_start
+        return cls.simulated_time / wall_time if wall_time > 0 else 0
+
+    @classmethod
+    def report(cls) -> str:
+        return (f"{cls.frame_count} frames, {cls.simulated_time:.1f} simulated seconds, "
+                f"{cls.get_simulation_speed():.1f} simulated seconds per wall second")
+
     @classmethod
     def stop_instance(cls, instance) -> None:
         cls.stack.remove(instance)
@@ -1,3 +1,4 @@
 from isec.objects.cached_surface import CachedSurface
+from isec.objects.lazy_dict import LazyDict
 
-__all__ = [CachedSurface]
+__all__ = [CachedSurface, LazyDict]
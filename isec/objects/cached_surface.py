@@ -1,10 +1,31 @@
+import collections
+import weakref
 import pygame
+import zlib
+
+from isec.objects.disk_cache import DiskCache
+from isec.objects.surface_atlas import SurfaceAtlas
 
 
 class CachedSurface(pygame.Surface):
+    """
+    A surface with its rotated frames precomputed for caching_size evenly spaced angles.
+
+    In lazy mode, a frame is only rendered the first time its angle is requested.
+    Lazy frames of every CachedSurface share memory_budget (in bytes): when it is exceeded,
+    the least recently used frames are dropped and will be rendered again if needed.
+    """
+
+    memory_budget: int | None = None
+
+    _lru: collections.OrderedDict[tuple[int, int], tuple[weakref.ref, int]] = collections.OrderedDict()
+    _lru_size: int = 0
+
     def __init__(self,
                  base_surface: pygame.Surface,
-                 caching_size: int) -> None:
+                 caching_size: int,
+                 disk_cache: DiskCache = None,
+                 lazy: bool = False) -> None:
 
         super().__init__(base_surface.get_size())
 
@@ -16,16 +37,162 @@ class CachedSurface(pygame.Surface):
         self.surfaces = []
         self.blit(base_surface, (0, 0))
 
+        self.hits = 0
+        self.misses = 0
+        self.atlas_frames: list[tuple[pygame.Surface, pygame.Rect]] | None = None
+        self._lazy = lazy
+        self._base_surface = base_surface if lazy else None
+
+        if lazy:
+            self.surfaces = [None] * caching_size
+            return
+
+        # Rotated frames can only be stored losslessly as RGBA if the base surface has per-pixel alpha.
+        if disk_cache is not None and not base_surface.get_flags() & pygame.SRCALPHA:
+            disk_cache = None
+
+        if disk_cache is not None and self._load_surfaces(base_surface, disk_cache):
+            return
+
         for i in range(caching_size):
             self.surfaces.append(pygame.transform.rotate(base_surface, i * self._caching_step))
 
+        if disk_cache is not None:
+            self._save_surfaces(base_surface, disk_cache)
+
+    def _get_cache_name(self,
+                        base_surface: pygame.Surface) -> str:
+
+        width, height = base_surface.get_size()
+        pixels_hash = DiskCache.hash_bytes(pygame.image.tobytes(base_surface, "RGBA"))
+
+        return f"{pixels_hash}-{width}x{height}-{self._caching_size}"
+
+    def _load_surfaces(self,
+                       base_surface: pygame.Surface,
+                       disk_cache: DiskCache) -> bool:
+        """Load the rotated frames stored in disk_cache one at a time. Return False on a cache miss."""
+
+        cache_name = self._get_cache_name(base_surface)
+        meta = disk_cache.read_meta(cache_name)
+        convert = pygame.display.get_surface() is not None
+        surfaces = []
+
+        # Decompressed chunk by chunk, so only about a frame of raw pixels is held at once.
+        try:
+            with open(disk_cache.get_path(cache_name, ".frames.z"), "rb") as file:
+                decompressor = zlib.decompressobj()
+                pixels = bytearray()
+
+                for width, height in meta["frames"]:
+                    frame_size = width * height * 4
+                    while len(pixels) < frame_size:
+                        chunk = file.read(65536)
+                        if not chunk:
+                            raise ValueError("Truncated frame.")
+                        pixels += decompressor.decompress(chunk)
+
+                    surface = pygame.image.frombytes(bytes(pixels[:frame_size]), (width, height), "RGBA")
+                    surfaces.append(surface.convert_alpha() if convert else surface)
+                    del pixels[:frame_size]
+
+        except (OSError, KeyError, TypeError, ValueError, zlib.error):
+            disk_cache.misses += 1
+            return False
+
+        self.surfaces = surfaces
+        disk_cache.hits += 1
+        return True
+
+    def _save_surfaces(self,
+                       base_surface: pygame.Surface,
+                       disk_cache: DiskCache) -> None:
+        """Store the rotated frames one after the other, compressed since they are mostly transparent."""
+
+        cache_name = self._get_cache_name(base_surface)
+        compressor = zlib.compressobj(1)
+
+        with disk_cache.open_for_write(cache_name, ".frames.z") as file:
+            for surface in self.surfaces:
+                file.write(compressor.compress(pygame.image.tobytes(surface, "RGBA")))
+            file.write(compressor.flush())
+
+        disk_cache.write_meta(cache_name, {"frames": [list(surface.get_size()) for surface in self.surfaces]})
+
+    def move_to_atlas(self,
+                      atlas: SurfaceAtlas,
+                      handles: list[tuple[int, pygame.Rect]]) -> None:
+        """Replace every rotated frame by its copy in atlas, handles being the result of atlas.pack(self.surfaces)."""
+
+        if self._lazy:
+            raise ValueError("Lazy cached surfaces can't be moved to an atlas.")
+
+        self.surfaces = [atlas.get_surface(handle) for handle in handles]
+        self.atlas_frames = [(atlas.sheets[sheet_index], rect) for sheet_index, rect in handles]
+
+    def get_atlas_frame(self,
+                        angle: float) -> tuple[pygame.Surface, pygame.Rect]:
+        """Return the atlas sheet and the area of the frame for angle."""
+
+        return self.atlas_frames[self._get_surface_index(angle)]
+
     def _get_surface_index(self,
                            angle: float) -> int:
 
         return round(angle % 360 / self._caching_step) % self._caching_size
 
     def __getitem__(self, item):
-        return self.surfaces[self._get_surface_index(item)]
+        if not self._lazy:
+            return self.surfaces[self._get_surface_index(item)]
+
+        index = self._get_surface_index(item)
+        surface = self.surfaces[index]
+
+        if surface is not None:
+            self.hits += 1
+            CachedSurface._lru.move_to_end((id(self), index))
+            return surface
+
+        self.misses += 1
+        surface = pygame.transform.rotate(self._base_surface, index * self._caching_step)
+        self.surfaces[index] = surface
+
+        surface_size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        CachedSurface._lru[(id(self), index)] = (weakref.ref(self), surface_size)
+        CachedSurface._lru_size += surface_size
+        CachedSurface._evict()
+
+        return surface
+
+    @classmethod
+    def set_memory_budget(cls,
+                          memory_budget: int | None) -> None:
+
+        cls.memory_budget = memory_budget
+        cls._evict()
+
+    @classmethod
+    def _evict(cls) -> None:
+        """Drop least recently used lazy frames until the memory budget is met. The last frame is always kept."""
+
+        if cls.memory_budget is None:
+            return
+
+        while cls._lru_size > cls.memory_budget and len(cls._lru) > 1:
+            (_owner_id, index), (owner_ref, surface_size) = cls._lru.popitem(last=False)
+            cls._lru_size -= surface_size
+
+            owner = owner_ref()
+            if owner is not None:
+                owner.surfaces[index] = None
+
+    def __del__(self) -> None:
+        if not getattr(self, "_lazy", False):
+            return
+
+        for index, surface in enumerate(self.surfaces):
+            if surface is not None and (id(self), index) in CachedSurface._lru:
+                CachedSurface._lru_size -= CachedSurface._lru.pop((id(self), index))[1]
 
     def __repr__(self):
         return f'CachedSurface with {len(self.surfaces)} surfaces.\n({self.surfaces})'
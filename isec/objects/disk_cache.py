@@ -0,0 +1,89 @@
+import contextlib
+import tempfile
+import hashlib
+import json
+import os
+
+from isec._ise_typing import PathLike
+
+
+class DiskCache:
+    """
+    A directory of files computed once and reused across launches.
+
+    Each entry is stored under a name, next to a small json metadata file used to check that it is still valid.
+    Hits and misses are counted so the savings can be reported.
+    Files are written under a temporary name then renamed, so processes sharing the directory never read
+    a partially written file.
+    """
+
+    def __init__(self,
+                 directory: PathLike) -> None:
+
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def get_path(self,
+                 name: str,
+                 extension: str = "") -> str:
+
+        return os.path.join(self.directory, name + extension)
+
+    def read_meta(self,
+                  name: str) -> dict[str, ...] | None:
+        """Return the metadata stored with the entry, or None if there is no such entry."""
+
+        try:
+            with open(self.get_path(name, ".json")) as file:
+                meta = json.load(file)
+
+        except (OSError, ValueError):
+            return None
+
+        return meta if isinstance(meta, dict) else None
+
+    def write_meta(self,
+                   name: str,
+                   meta: dict[str, ...]) -> None:
+        """Write the metadata of an entry. Must be called after the entry itself is written."""
+
+        with self.open_for_write(name, ".json", "w") as file:
+            json.dump(meta, file)
+
+    @contextlib.contextmanager
+    def open_for_write(self,
+                       name: str,
+                       extension: str = "",
+                       mode: str = "wb"):
+        """Open a temporary file, moved in place of the entry file once closed without error."""
+
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix=f".{name}", suffix=".tmp")
+
+        try:
+            with open(descriptor, mode) as file:
+                yield file
+            os.replace(temporary_path, self.get_path(name, extension))
+
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporary_path)
+            raise
+
+    def prepare(self) -> bool:
+        """Create the cache directory. Return False if the cache can't be written to."""
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+        except OSError:
+            return False
+
+        return os.access(self.directory, os.W_OK)
+
+    def report(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -0,0 +1,128 @@
+import collections.abc
+import typing
+
+
+class _LazyValue:
+    __slots__ = ["loader"]
+
+    def __init__(self,
+                 loader: typing.Callable[[], typing.Any]) -> None:
+
+        self.loader = loader
+
+
+class LazyDict(collections.abc.MutableMapping):
+    """
+    A dict in which values can be registered as loaders.
+
+    A lazy value is loaded on first access, then memoized in place.
+    Values set the usual way behave exactly like in a regular dict.
+    Every way of reading a value loads it (values, items, dict(), unpacking...), copy and | keep values lazy.
+    """
+
+    def __init__(self,
+                 *args,
+                 **kwargs) -> None:
+
+        self._data: dict[typing.Hashable, typing.Any] = {}
+        self.update(*args, **kwargs)
+
+    def set_lazy(self,
+                 key: typing.Hashable,
+                 loader: typing.Callable[[], typing.Any]) -> None:
+        """Register a loader that will be called on first access of key."""
+
+        self._data[key] = _LazyValue(loader)
+
+    def is_loaded(self,
+                  key: typing.Hashable) -> bool:
+
+        return not isinstance(self._data[key], _LazyValue)
+
+    def transform(self,
+                  key: typing.Hashable,
+                  function: typing.Callable[[typing.Any], typing.Any]) -> None:
+        """Replace the value by function(value), now if it is loaded or right after loading otherwise."""
+
+        value = self._data[key]
+
+        if isinstance(value, _LazyValue):
+            loader = value.loader
+            self._data[key] = _LazyValue(lambda: function(loader()))
+            return
+
+        self._data[key] = function(value)
+
+    def copy(self) -> "LazyDict":
+        """Return a shallow copy, in which values not loaded yet are still lazy (and loaded separately)."""
+
+        copied = LazyDict()
+        copied._data = self._data.copy()
+        return copied
+
+    def __getitem__(self,
+                    key: typing.Hashable) -> typing.Any:
+
+        value = self._data[key]
+
+        if isinstance(value, _LazyValue):
+            value = value.loader()
+            self._data[key] = value
+
+        return value
+
+    def __setitem__(self,
+                    key: typing.Hashable,
+                    value: typing.Any) -> None:
+
+        self._data[key] = value
+
+    def __delitem__(self,
+                    key: typing.Hashable) -> None:
+
+        del self._data[key]
+
+    def __contains__(self,
+                     key: typing.Hashable) -> bool:
+
+        return key in self._data
+
+    def __iter__(self) -> typing.Iterator[typing.Hashable]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __or__(self,
+               other: typing.Mapping) -> "LazyDict":
+
+        if not isinstance(other, collections.abc.Mapping):
+            return NotImplemented
+
+        merged = self.copy()
+        merged |= other
+        return merged
+
+    def __ror__(self,
+                other: typing.Mapping) -> "LazyDict":
+
+        if not isinstance(other, collections.abc.Mapping):
+            return NotImplemented
+
+        merged = LazyDict(other)
+        merged._data.update(self._data)
+        return merged
+
+    def __ior__(self,
+                other: typing.Mapping) -> "LazyDict":
+
+        if isinstance(other, LazyDict):
+            self._data.update(other._data)
+        else:
+            self.update(other)
+        return self
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{key!r}: {'<lazy>' if isinstance(value, _LazyValue) else repr(value)}"
+                           for key, value in self._data.items())
+        return f"LazyDict({{{values}}})"
@@ -0,0 +1,83 @@
+import pygame
+
+
+class SurfaceAtlas:
+    """
+    A few large sheets holding many small surfaces.
+
+    Surfaces are packed on shelves, tallest first. A surface bigger than a sheet gets a sheet of its own.
+    The last sheet of each pack is cropped to its content.
+    Each packed surface is referred to by a handle: its sheet index and its rect inside that sheet.
+    """
+
+    def __init__(self,
+                 sheet_size: tuple[int, int] = (1024, 1024)) -> None:
+
+        self.sheet_size = tuple(sheet_size)
+        self.sheets: list[pygame.Surface] = []
+
+    def pack(self,
+             surfaces: list[pygame.Surface]) -> list[tuple[int, pygame.Rect]]:
+        """Copy surfaces into new sheets and return their handles, in the same order as surfaces."""
+
+        handles: list[tuple[int, pygame.Rect] | None] = [None] * len(surfaces)
+        order = sorted(range(len(surfaces)), key=lambda i: surfaces[i].get_height(), reverse=True)
+
+        sheet_rects: list[list[tuple[int, pygame.Rect]]] = []
+        oversized: list[int] = []
+        shelf_x = shelf_y = shelf_height = 0
+
+        for i in order:
+            width, height = surfaces[i].get_size()
+
+            if width > self.sheet_size[0] or height > self.sheet_size[1]:
+                oversized.append(i)
+                continue
+
+            if shelf_x + width > self.sheet_size[0]:
+                shelf_x = 0
+                shelf_y += shelf_height
+                shelf_height = 0
+
+            if not sheet_rects or shelf_y + height > self.sheet_size[1]:
+                sheet_rects.append([])
+                shelf_x = shelf_y = shelf_height = 0
+
+            sheet_rects[-1].append((i, pygame.Rect(shelf_x, shelf_y, width, height)))
+            shelf_x += width
+            shelf_height = max(shelf_height, height)
+
+        regular_sheet_count = len(sheet_rects)
+        sheet_rects.extend([(i, surfaces[i].get_rect())] for i in oversized)
+
+        for sheet_index, rects in enumerate(sheet_rects):
+            if sheet_index < regular_sheet_count - 1:
+                sheet_size = self.sheet_size
+            elif sheet_index == regular_sheet_count - 1:
+                # The last sheet is only as big as its content, surfaces packed on their own don't get a full sheet.
+                sheet_size = (max(rect.right for _, rect in rects), max(rect.bottom for _, rect in rects))
+            else:
+                sheet_size = rects[0][1].size
+            sheet = pygame.Surface(sheet_size, pygame.SRCALPHA)
+
+            for i, rect in rects:
+                # Max blending on a transparent sheet copies pixels exactly, alpha included.
+                sheet.blit(surfaces[i], rect, special_flags=pygame.BLEND_RGBA_MAX)
+                handles[i] = (len(self.sheets), rect)
+
+            if pygame.display.get_surface() is not None:
+                sheet = sheet.convert_alpha()
+
+            self.sheets.append(sheet)
+
+        return handles
+
+    def get_surface(self,
+                    handle: tuple[int, pygame.Rect]) -> pygame.Surface:
+        """Return a subsurface sharing the pixels of the sheet."""
+
+        sheet_index, rect = handle
+        return self.sheets[sheet_index].subsurface(rect)
+
+    def __repr__(self):
+        return f'SurfaceAtlas with {len(self.sheets)} sheets of {self.sheet_size}.'
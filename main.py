@@ -1,4 +1,6 @@
+import argparse
 import asyncio
+import random
 import numpy
 import pymunk
 import pygame
@@ -6,14 +8,85 @@ import math
 import time
 
 from isec.app import App, Resource
+from isec.instance import LoopHandler, EventHandler, FrameProfiler, InputRecorder, InputReplay
 from game.instances.menu import Menu
 
 __all__ = [asyncio, numpy, pymunk, pygame, math, time, App, Resource, Menu]
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headless", action="store_true",
+                        help="run the world without window nor sound, as fast as possible")
+    parser.add_argument("--map", default=None,
+                        help="start directly in the world on this map (surface when headless) instead of the menu")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="simulated seconds after which the headless run stops")
+    parser.add_argument("--profile", action="store_true",
+                        help="time the phases of every frame and show their percentiles on screen")
+    parser.add_argument("--profile-export", default=None,
+                        help="write the frame timings to this .csv or .json file on exit")
+    parser.add_argument("--record", default=None,
+                        help="record the input of the session to this file, with a fixed delta")
+    parser.add_argument("--replay", default=None,
+                        help="play back an input recording, with a fixed delta, and quit at its end")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the random generators, stored in recordings")
+    return parser.parse_args()
+
+
+def export_profile(path: str) -> None:
+    print(FrameProfiler.report())
+    if path is None:
+        return
+
+    if path.endswith(".json"):
+        FrameProfiler.export_json(path)
+    else:
+        FrameProfiler.export_csv(path)
+
+
 async def main():
-    App.init("game/assets/")
-    await Menu().execute()
+    args = parse_args()
+    App.init("game/assets/", headless=args.headless)
+
+    if args.profile or args.profile_export is not None:
+        FrameProfiler.enable(overlay=args.profile)
+
+    map_name = args.map if args.map is not None or not args.headless else "surface"
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+
+    if args.replay is not None:
+        EventHandler.input_source = InputReplay(args.replay, on_end=LoopHandler.stop_game)
+        map_name = EventHandler.input_source.metadata["map"]
+        seed = EventHandler.input_source.metadata["seed"]
+        LoopHandler.fixed_delta = True
+
+    elif args.record is not None:
+        EventHandler.input_source = InputRecorder(args.record, {"map": map_name, "seed": seed})
+        LoopHandler.fixed_delta = True
+
+    random.seed(seed)
+    numpy.random.seed(seed)
+
+    try:
+        if map_name is None:
+            await Menu().execute()
+            return
+
+        from game.instances.world import World
+
+        World.map_name = map_name
+        LoopHandler.simulation_limit = args.duration
+        try:
+            await World().execute()
+        finally:
+            print(LoopHandler.report())
+
+    finally:
+        EventHandler.input_source.close()
+        if FrameProfiler.enabled:
+            export_profile(args.profile_export)
 
 
 asyncio.run(main())